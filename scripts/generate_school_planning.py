@@ -0,0 +1,425 @@
+import argparse
+import bisect
+import json
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_week_planning as planner
+
+
+def load_school_input(filename='scripts/sample_school_input.json'):
+    """
+    Load the planning input of a whole school:
+
+    {
+        "rijschool": {"autos": [{"id": ..., "naam": ...}]},
+        "instructeurs": [{"id": ..., "naam": ..., "auto": <auto id>, "beschikbareUren": ..., "datums": ..., settings}],
+        "leerlingen": [{... same as the single instructor input ..., "instructeurs": [<instructor ids>]}]
+    }
+
+    A student without "instructeurs" can take lessons from every instructor, and an
+    instructor without "auto" has a car of their own.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def get_instructor_settings(instructor):
+    """AI settings of one instructor: the instructor's own values, the environment as default"""
+    settings = planner.get_settings_from_env()
+    settings.update({key: instructor[key] for key in settings if key in instructor})
+    return settings
+
+def solve_instructor(task):
+    """
+    Plan the week of one instructor (runs in a worker process).
+
+    task: (instructor, students, blocked, reserved, variations, start_options), where
+    blocked holds the times {day: [(start, end)]} the instructor's car is already in use
+    and reserved the instructor's own lessons {day: [lessons]} from earlier rounds.
+    Returns the planned lessons (without pauses).
+    """
+    instructor, students, blocked, reserved, variations, start_options = task
+    if not students:
+        return []
+    problem = planner.prepare_problem({'instructeur': instructor, 'leerlingen': students}, get_instructor_settings(instructor))
+    problem['blocked'] = blocked
+    # Own lessons count for the pauses and the longest run of lessons, not only as car time
+    problem['reserved'] = reserved
+    best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = planner.search_best_week_planning(problem, variations, start_options)
+    return [lesson for lesson in results[best_week_index][3]['lessons'] if lesson['studentId'] != "PAUSE"]
+
+def to_day_blocked(blocked, date_to_day):
+    """Map blocked car time {date: [(start, end)]} onto the day names of one instructor's week"""
+    return {date_to_day[date]: intervals for date, intervals in blocked.items() if date in date_to_day}
+
+def solve_car_instructors(task):
+    """
+    Re-solve the instructors of one car one after another (runs in a worker process).
+
+    task: (blocked, instructor_tasks), where blocked holds the car time {date: [(start, end)]}
+    of the instructors that keep their plan, and instructor_tasks holds
+    (instructor, students, date_to_day, reserved, variations, start_options) in car order. The car
+    time of every re-solved instructor is blocked for the next ones.
+    Returns the planned lessons of every instructor, in the order of instructor_tasks.
+    """
+    blocked, instructor_tasks = task
+    blocked = defaultdict(list, {date: list(intervals) for date, intervals in blocked.items()})
+    car_lessons = []
+    for instructor, students, date_to_day, reserved, variations, start_options in instructor_tasks:
+        instructor_lessons = solve_instructor((instructor, students, to_day_blocked(blocked, date_to_day), reserved, variations, start_options))
+        for lesson in instructor_lessons:
+            blocked[lesson['date']].append((planner.parse_time(lesson['startTime']), planner.parse_time(lesson['endTime'])))
+        car_lessons.append(instructor_lessons)
+    return car_lessons
+
+class ResourceIndex:
+    """
+    Interval index of one shared resource (a car): per date, the sorted start times,
+    end times and owners of the lessons that use it.
+    """
+
+    def __init__(self):
+        self.intervals = defaultdict(list)
+
+    def add(self, date, start, end, owner):
+        bisect.insort(self.intervals[date], (start, end, owner), key=lambda interval: interval[:2])
+
+    def blocked_for(self, owners):
+        """The intervals {date: [(start, end)]} used by the given owners"""
+        blocked = {}
+        for date, intervals in self.intervals.items():
+            owner_intervals = [(start, end) for start, end, owner in intervals if owner in owners]
+            if owner_intervals:
+                blocked[date] = owner_intervals
+        return blocked
+
+    def conflicts(self):
+        """Pairs of owners whose intervals overlap on the same date"""
+        conflicts = []
+        for date, intervals in self.intervals.items():
+            latest_end, latest_owner = None, None
+            for start, end, owner in intervals:
+                if latest_end is not None and start < latest_end and owner != latest_owner:
+                    conflicts.append((date, latest_owner, owner))
+                if latest_end is None or end > latest_end:
+                    latest_end, latest_owner = end, owner
+        return conflicts
+
+def assign_students(school, student_quotas, excluded_days=None, load=None):
+    """
+    Assign every student with a quota to one eligible instructor: the one with the lowest
+    requested share of their available minutes. Students with the fewest eligible
+    instructors are assigned first.
+
+    Returns:
+        ({instructor id: [student dicts with lessenPerWeek set to the quota]}, {instructor id: assigned minutes})
+    """
+    instructors = {instructor['id']: instructor for instructor in school['instructeurs']}
+    available_minutes = {
+        instructor_id: sum(
+            planner.parse_time(hours[1]) - planner.parse_time(hours[0])
+            for hours in instructor['beschikbareUren'].values() if hours and len(hours) >= 2
+        ) or 1
+        for instructor_id, instructor in instructors.items()
+    }
+    load = dict(load or {instructor_id: 0 for instructor_id in instructors})
+    excluded_days = excluded_days or {}
+
+    assignment = defaultdict(list)
+    students = [student for student in school['leerlingen'] if student_quotas.get(student['id'], 0) > 0]
+    for student in sorted(students, key=lambda s: (len(s.get('instructeurs') or instructors), s['id'])):
+        eligible = [instructor_id for instructor_id in (student.get('instructeurs') or instructors) if instructor_id in instructors]
+        if not eligible:
+            continue
+        instructor_id = min(eligible, key=lambda i: (load[i] / available_minutes[i], i))
+        quota = student_quotas[student['id']]
+        availability = {
+            day: window for day, window in student['beschikbaarheid'].items()
+            if day not in excluded_days.get(student['id'], set())
+        }
+        assignment[instructor_id].append(dict(student, lessenPerWeek=quota, beschikbaarheid=availability))
+        load[instructor_id] += quota * (student['lesDuur'] + get_instructor_settings(instructors[instructor_id])['pauzeTussenLessen'])
+    return assignment, load
+
+def plan_school(school, seed=0, random_variations=20, max_workers=None, stats=None):
+    """
+    Plan all instructors of a school together.
+
+    Every instructor is a subproblem that is solved in parallel. Instructors are only
+    coupled through shared resources:
+
+    - Cars: instructors that share a car are ordered (input order). All instructors
+      are solved at once, and each car gets an interval index of the lessons. Of every
+      two instructors that use a car at the same time, the later one is re-solved with
+      the car time of the instructors that keep their plan blocked. The re-solved
+      instructors of a car run in one task, in car order, so the cars are repaired
+      in parallel in a single extra round.
+    - Students: a student is planned by one instructor at a time. When a student falls
+      short and can also take lessons from another instructor, the rest of their quota
+      moves to that instructor, without the days they already have a lesson.
+
+    With a stats dict, the number of solve rounds ('rondes') and instructor solves
+    ('instructeur_oplossingen') are counted in it.
+
+    Returns:
+        {instructor id: [lessons]}
+    """
+    instructors = {instructor['id']: instructor for instructor in school['instructeurs']}
+    variations, start_options = planner.seeded_day_variations(seed, random_variations)
+
+    car_users = defaultdict(list)
+    for instructor in school['instructeurs']:
+        car_users[instructor.get('auto') or f"eigen-{instructor['id']}"].append(instructor['id'])
+    instructor_car = {instructor_id: car for car, users in car_users.items() for instructor_id in users}
+
+    week_order = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
+    date_to_day = {
+        instructor_id: {date: week_order[i] for i, date in enumerate(instructor.get('datums', [])[:7])}
+        for instructor_id, instructor in instructors.items()
+    }
+
+    quotas = {student['id']: student['lessenPerWeek'] for student in school['leerlingen']}
+    assignment, load = assign_students(school, quotas)
+    # Students that were already planned by an instructor, with their lesson days
+    planned_days = defaultdict(set)
+    tried_instructors = defaultdict(set)
+    settled_lessons = {instructor_id: [] for instructor_id in instructors}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            lessons = {instructor_id: [] for instructor_id in instructors}
+            car_indexes = defaultdict(ResourceIndex)
+            reserved = {instructor_id: defaultdict(list) for instructor_id in instructors}
+            for instructor_id in instructors:
+                # Settled lessons (owner None) keep their car time for every instructor of the car
+                for lesson in settled_lessons[instructor_id]:
+                    reserved[instructor_id][date_to_day[instructor_id][lesson['date']]].append(lesson)
+                    car_indexes[instructor_car[instructor_id]].add(
+                        lesson['date'], planner.parse_time(lesson['startTime']), planner.parse_time(lesson['endTime']), None
+                    )
+
+            # Car coordination: solve every instructor at once...
+            to_solve = [instructor_id for instructor_id in instructors if assignment.get(instructor_id)]
+            tasks = [
+                (instructors[instructor_id], assignment[instructor_id], to_day_blocked(car_indexes[instructor_car[instructor_id]].blocked_for({None}), date_to_day[instructor_id]), reserved[instructor_id], variations, start_options)
+                for instructor_id in to_solve
+            ]
+            for instructor_id, instructor_lessons in zip(to_solve, executor.map(solve_instructor, tasks)):
+                lessons[instructor_id] = instructor_lessons
+                for lesson in instructor_lessons:
+                    car_indexes[instructor_car[instructor_id]].add(
+                        lesson['date'], planner.parse_time(lesson['startTime']), planner.parse_time(lesson['endTime']), instructor_id
+                    )
+            rounds = 1
+
+            # ...then re-solve the later instructor of every two that use a car at the same
+            # time. The instructors of one car are re-solved in one task, in car order, so
+            # this single round leaves no car used twice at the same time.
+            car_tasks = []
+            for car, users in car_users.items():
+                repair = {
+                    max(first, second, key=lambda owner: users.index(owner) if owner is not None else -1)
+                    for date, first, second in car_indexes[car].conflicts()
+                }
+                if repair:
+                    car_tasks.append((
+                        car_indexes[car].blocked_for({None} | (set(users) - repair)),
+                        [(instructors[instructor_id], assignment[instructor_id], date_to_day[instructor_id], reserved[instructor_id], variations, start_options) for instructor_id in users if instructor_id in repair]
+                    ))
+            if car_tasks:
+                for car_task, car_lessons in zip(car_tasks, executor.map(solve_car_instructors, car_tasks)):
+                    for instructor_task, instructor_lessons in zip(car_task[1], car_lessons):
+                        lessons[instructor_task[0]['id']] = instructor_lessons
+                rounds += 1
+            if stats is not None:
+                stats['rondes'] = stats.get('rondes', 0) + rounds
+                stats['instructeur_oplossingen'] = stats.get('instructeur_oplossingen', 0) + len(to_solve) + sum(len(car_task[1]) for car_task in car_tasks)
+
+            # Student coordination: move the rest of a short student's quota to another instructor
+            planned = defaultdict(int)
+            for instructor_id, instructor_lessons in lessons.items():
+                settled_lessons[instructor_id].extend(instructor_lessons)
+                for lesson in instructor_lessons:
+                    planned[lesson['studentId']] += 1
+                    planned_days[lesson['studentId']].add(date_to_day[instructor_id][lesson['date']])
+            for instructor_id, students in assignment.items():
+                for student in students:
+                    tried_instructors[student['id']].add(instructor_id)
+
+            remaining_quotas = {}
+            for student in school['leerlingen']:
+                quotas[student['id']] -= planned[student['id']]
+                eligible = set(student.get('instructeurs') or instructors) & set(instructors)
+                if quotas[student['id']] > 0 and eligible - tried_instructors[student['id']]:
+                    remaining_quotas[student['id']] = quotas[student['id']]
+            if not remaining_quotas:
+                break
+
+            rebalancing_school = dict(school, leerlingen=[
+                dict(student, instructeurs=sorted(
+                    (set(student.get('instructeurs') or instructors) & set(instructors)) - tried_instructors[student['id']]
+                ))
+                for student in school['leerlingen'] if student['id'] in remaining_quotas
+            ])
+            assignment, load = assign_students(rebalancing_school, remaining_quotas, planned_days, load)
+
+    return settled_lessons
+
+def make_benchmark_school(template, instructor_count=24, student_count=240, car_count=8, seed=0):
+    """
+    Build a synthetic school of the given size from a school input: instructors and
+    students are copies of the template's (new ids), instructors share the cars in turn,
+    and every student can take lessons from one to three random instructors.
+    """
+    rng = random.Random(seed)
+    template_instructors = template['instructeurs']
+    instructors = [
+        dict(template_instructors[i % len(template_instructors)], id=f"instructeur-{i + 1}", naam=f"Instructeur {i + 1}", auto=f"auto-{i % car_count + 1}")
+        for i in range(instructor_count)
+    ]
+    students = [
+        dict(
+            template['leerlingen'][j % len(template['leerlingen'])],
+            id=f"leerling-{j + 1}",
+            naam=f"Leerling {j + 1}",
+            instructeurs=rng.sample([instructor['id'] for instructor in instructors], rng.randint(1, 3))
+        )
+        for j in range(student_count)
+    ]
+    return {
+        "rijschool": {"autos": [{"id": f"auto-{k + 1}", "naam": f"Auto {k + 1}"} for k in range(car_count)]},
+        "instructeurs": instructors,
+        "leerlingen": students
+    }
+
+def run_benchmark(school, seed=0, random_variations=20):
+    """
+    Time plan_school on a school and compare it with the slowest single instructor
+    solve, which is the time one round takes with a worker per instructor.
+    """
+    variations, start_options = planner.seeded_day_variations(seed, random_variations)
+    assignment, load = assign_students(school, {student['id']: student['lessenPerWeek'] for student in school['leerlingen']})
+    single_solve_seconds = 0
+    for instructor in school['instructeurs']:
+        start_time = time.perf_counter()
+        solve_instructor((instructor, assignment.get(instructor['id'], []), {}, {}, variations, start_options))
+        single_solve_seconds = max(single_solve_seconds, time.perf_counter() - start_time)
+
+    stats = {}
+    start_time = time.perf_counter()
+    school_lessons = plan_school(school, seed, random_variations, stats=stats)
+    school_seconds = time.perf_counter() - start_time
+
+    print(f"Rondes: {stats.get('rondes', 0)} ({stats.get('instructeur_oplossingen', 0)} instructeur oplossingen)")
+    print(f"Looptijd: {school_seconds:.2f}s, traagste enkele instructeur: {single_solve_seconds:.2f}s ({school_seconds / single_solve_seconds:.1f}x)")
+    return school_lessons
+
+def get_instructor_totals(school_lessons):
+    """Return the total number of lessons and the minutes between lessons of every instructor"""
+    totals = {}
+    for instructor_id, lessons in school_lessons.items():
+        lessons_by_date = defaultdict(list)
+        for lesson in lessons:
+            lessons_by_date[lesson['date']].append((planner.parse_time(lesson['startTime']), planner.parse_time(lesson['endTime'])))
+        total_time_between_lessons = 0
+        for day_lessons in lessons_by_date.values():
+            day_lessons.sort()
+            total_time_between_lessons += sum(next_start - end for (start, end), (next_start, next_end) in zip(day_lessons, day_lessons[1:]))
+        totals[instructor_id] = (len(lessons), total_time_between_lessons)
+    return totals
+
+def create_school_output_json(school, school_lessons, filename="src/app/dashboard/ai-schedule/school_planning.json"):
+    """Write the planning of every instructor, plus the students that fell short, to a JSON file"""
+    totals = get_instructor_totals(school_lessons)
+    planned = defaultdict(int)
+    car_indexes = defaultdict(ResourceIndex)
+    for instructor in school['instructeurs']:
+        for lesson in school_lessons[instructor['id']]:
+            if instructor.get('auto'):
+                car_indexes[instructor['auto']].add(
+                    lesson['date'], planner.parse_time(lesson['startTime']), planner.parse_time(lesson['endTime']), instructor['id']
+                )
+    for lessons in school_lessons.values():
+        for lesson in lessons:
+            planned[lesson['studentId']] += 1
+
+    output_data = {
+        "instructeurs": [
+            {
+                "id": instructor['id'],
+                "naam": instructor.get('naam', instructor['id']),
+                "auto": instructor.get('auto'),
+                "lessons": sorted(
+                    (
+                        {
+                            "date": lesson['date'],
+                            "startTime": lesson['startTime'],
+                            "endTime": lesson['endTime'],
+                            "studentId": lesson['studentId'],
+                            "studentName": lesson['studentName'],
+                            "instructorId": instructor['id'],
+                            "notes": ""
+                        }
+                        for lesson in school_lessons[instructor['id']]
+                    ),
+                    key=lambda x: (x['date'], x['startTime'])
+                ),
+                "schedule_details": {
+                    "lessen": totals[instructor['id']][0],
+                    "totale_minuten_tussen_lessen": totals[instructor['id']][1]
+                }
+            }
+            for instructor in school['instructeurs']
+        ],
+        # Should stay empty: a car is never used by two instructors at the same time
+        "auto_conflicten": [
+            {"auto": car, "date": date, "instructeurs": [first, second]}
+            for car, index in car_indexes.items()
+            for date, first, second in index.conflicts()
+        ],
+        "leerlingen_zonder_les": {
+            student['naam']: student['lessenPerWeek'] - planned[student['id']]
+            for student in school['leerlingen']
+            if student['lessenPerWeek'] > planned[student['id']]
+        },
+        "schedule_details": {
+            "lessen": sum(total[0] for total in totals.values()),
+            "totale_minuten_tussen_lessen": sum(total[1] for total in totals.values())
+        }
+    }
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+
+    print(f"JSON bestand '{filename}' succesvol aangemaakt!")
+    print(f"Aantal lessen: {output_data['schedule_details']['lessen']}")
+    print(f"Totale minuten tussen lessen: {output_data['schedule_details']['totale_minuten_tussen_lessen']}")
+    print(f"Leerlingen zonder voldoende lessen: {len(output_data['leerlingen_zonder_les'])}")
+    print(f"Auto conflicten: {len(output_data['auto_conflicten'])}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genereer een weekplanning voor alle instructeurs van een rijschool samen")
+    parser.add_argument('--input', default='scripts/sample_school_input.json', help="Invoerbestand met rijschool, instructeurs en leerlingen")
+    parser.add_argument('--output', default='src/app/dashboard/ai-schedule/school_planning.json', help="Uitvoerbestand")
+    parser.add_argument('--seed', type=int, default=0, help="Seed voor de willekeurige dag volgordes")
+    parser.add_argument('--variaties', type=int, default=20, help="Aantal willekeurige dag volgordes per instructeur")
+    parser.add_argument('--benchmark', nargs=3, type=int, metavar=('INSTRUCTEURS', 'LEERLINGEN', 'AUTOS'), help="Plan een synthetische rijschool van deze omvang (gemaakt van de invoer) en meet rondes en looptijd")
+    args = parser.parse_args()
+
+    school = load_school_input(args.input)
+    if args.benchmark:
+        school = make_benchmark_school(school, *args.benchmark, seed=args.seed)
+    print(f"=== PLANNING VOOR {len(school['instructeurs'])} INSTRUCTEURS EN {len(school['leerlingen'])} LEERLINGEN ===")
+    print()
+
+    if args.benchmark:
+        school_lessons = run_benchmark(school, args.seed, args.variaties)
+    else:
+        school_lessons = plan_school(school, args.seed, args.variaties)
+    for instructor in school['instructeurs']:
+        print(f"{instructor.get('naam', instructor['id'])}: {len(school_lessons[instructor['id']])} lessen")
+
+    print("\n=== JSON BESTAND AANMAKEN ===")
+    create_school_output_json(school, school_lessons, args.output)
@@ -1,10 +1,15 @@
+import argparse
+import hashlib
 import json
 import random
 import os
+import sys
 from datetime import datetime, timedelta
 import locale
 from collections import defaultdict
-from math import factorial
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from math import asin, ceil, cos, factorial, radians, sin, sqrt
 
 # Set locale to Dutch for day names
 try:
@@ -26,6 +31,21 @@ day_variations = [
     ['zondag', 'maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag'],
 ]
 
+# Travel time estimate between pickup locations: straight-line distance times a detour
+# factor for the road network, driven at an average urban speed
+TRAVEL_DETOUR_FACTOR = 1.3
+TRAVEL_SPEED_KMH = 30
+# Used when the location of one of the students is unknown
+UNKNOWN_TRAVEL_MINUTES = 15
+# With locatiesKoppelen, this many extra minutes of travel weigh as much as one
+# remaining lesson when choosing the next student
+TRAVEL_MINUTES_PER_LESSON = 20
+
+TRAVEL_TIME_CACHE_DIR = 'scripts/.travel_time_cache'
+
+# Longest run of lessons (with only the normal pause in between) before a long break
+MAX_CONSECUTIVE_MINUTES = 180
+
 
 def parse_time(time_str):
     """Parse time string in HH:MM format to minutes since midnight"""
@@ -68,46 +88,29 @@ def get_next_week_dates(random_week_index, instructor):
 def check_consecutive_lessons_time(day_lessons, new_lesson_start, new_lesson_end, instructor):
     """
     Check if adding a new lesson would create more than 3 hours of consecutive lessons.
+    Lessons are consecutive when the gap between them is at most the normal pause, so
+    only a longer break ends a run (pauses and time blocked by others are no lessons).
     Returns True if a long break is needed, False otherwise.
     """
-    if not day_lessons:
-        return False
-    
-    # Sort existing lessons by start time
-    sorted_lessons = sorted(day_lessons, key=lambda x: x['startTime'])
-    
-    # Find lessons that would be consecutive with the new lesson
-    consecutive_lessons = []
-    
-    for lesson in sorted_lessons:
-        lesson_start = parse_time(lesson['startTime'])
-        lesson_end = parse_time(lesson['endTime'])
-        
-        # Check if this lesson would be consecutive with the new lesson
-        # (no gap or gap less than minimum pause)
-        if (lesson_end <= new_lesson_start and 
-            new_lesson_start - lesson_end < instructor['pauzeTussenLessen']):
-            consecutive_lessons.append(lesson)
-        elif (new_lesson_end <= lesson_start and 
-              lesson_start - new_lesson_end < instructor['pauzeTussenLessen']):
-            consecutive_lessons.append(lesson)
-    
-    if not consecutive_lessons:
-        return False
-    
-    # Calculate total consecutive time
-    all_lessons = consecutive_lessons + [{'startTime': format_time(new_lesson_start), 'endTime': format_time(new_lesson_end)}]
-    all_lessons.sort(key=lambda x: x['startTime'])
-    
-    total_consecutive_time = parse_time(all_lessons[-1]['endTime']) - parse_time(all_lessons[0]['startTime'])
-    
-    # Check if we would exceed 3 hours (180 minutes)
-    if total_consecutive_time >= 180:
-        return True
-    
-    return False
+    intervals = sorted(
+        [(parse_time(lesson['startTime']), parse_time(lesson['endTime'])) for lesson in day_lessons if lesson['studentId'] not in ("PAUSE", "BEZET")]
+        + [(new_lesson_start, new_lesson_end)]
+    )
 
-def add_long_break_if_needed(day_lessons, new_lesson_start, new_lesson_end, instructor, students):
+    # Merge the lessons into runs and find the run the new lesson ends up in
+    runs = []
+    for start, end in intervals:
+        if runs and start - runs[-1][1] <= instructor['pauzeTussenLessen']:
+            runs[-1][1] = max(runs[-1][1], end)
+        else:
+            runs.append([start, end])
+
+    return any(
+        run_start <= new_lesson_start and new_lesson_end <= run_end and run_end - run_start > MAX_CONSECUTIVE_MINUTES
+        for run_start, run_end in runs
+    )
+
+def add_long_break_if_needed(day_lessons, new_lesson_start, new_lesson_end, instructor, students, print_details=False):
     """
     Add a 20-minute long break if adding a lesson would create more than 3 hours of consecutive lessons.
     Returns the adjusted start time for the new lesson.
@@ -116,7 +119,7 @@ def add_long_break_if_needed(day_lessons, new_lesson_start, new_lesson_end, inst
         return new_lesson_start
     
     # Find the best place to insert the long break
-    sorted_lessons = sorted(day_lessons, key=lambda x: x['startTime'])
+    sorted_lessons = sorted((lesson for lesson in day_lessons if lesson['studentId'] != "BEZET"), key=lambda x: x['startTime'])
     
     # Find the lesson that would come before the new lesson
     prev_lesson = None
@@ -183,23 +186,372 @@ def get_settings_from_env():
         'blokuren': os.getenv('BLOKUREN', 'true').lower() == 'true'
     }
 
-def generate_week_planning(random_week_index, start_vanaf_begin, print_details=True):
-    """Generate optimized week planning maximizing number of lessons"""
-    
-    # Load input data
-    with open('scripts/sample_input.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    instructor = data['instructeur']
-    students = data['leerlingen']
-    
+def load_input(filename='scripts/sample_input.json'):
+    """Load the planning input (instructeur + leerlingen) from a JSON file"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def compile_problem(data, settings=None):
+    """
+    Compile the raw input data into the problem dictionary used by the planner.
+
+    Args:
+        data: The parsed input JSON (instructeur + leerlingen)
+        settings: AI settings that override the instructor settings (default: from environment)
+    """
+    instructor = dict(data['instructeur'])
+
     # Override instructor settings with environment variables
-    env_settings = get_settings_from_env()
-    instructor.update(env_settings)
-    
-    # Get next week dates
-    week_dates = get_next_week_dates(random_week_index, instructor)
-    
+    instructor.update(settings if settings is not None else get_settings_from_env())
+
+    return {
+        'instructor': instructor,
+        'students': [dict(student) for student in data['leerlingen']],
+        # The unreduced students, used for reporting shortfalls against the original request
+        'original_students': data['leerlingen'],
+        'week_dates': get_next_week_dates(0, instructor),
+        'presolve_warnings': []
+    }
+
+def presolve_problem(problem):
+    """
+    Shrink a compiled problem before the search starts.
+
+    - Student windows are clipped to the instructor's available hours of that day
+    - Student days where the clipped window is shorter than lesDuur are dropped
+    - Students without any feasible day are dropped
+    - Instructor days without a date in datums or without eligible students are dropped
+    - lessenPerWeek is capped at the number of lessons the feasible days can hold
+      (two per day when a block hour fits, otherwise one)
+
+    Everything that is removed is reported as a structured warning in
+    problem['presolve_warnings'] and the weekly capacity per student is kept in
+    problem['capacities']. Returns a new problem dictionary.
+    """
+    instructor = problem['instructor']
+    datums = instructor.get('datums', [])
+    standard_week_order = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
+    presolve_warnings = list(problem['presolve_warnings'])
+
+    # Instructor windows for days that can actually be planned
+    instructor_windows = {}
+    for day, hours in instructor['beschikbareUren'].items():
+        if not hours or len(hours) < 2:
+            continue
+        # Without any datums the dates are calculated by get_next_week_dates, so only
+        # drop days when datums is given but doesn't cover this day
+        if day not in standard_week_order or (datums and standard_week_order.index(day) >= len(datums)):
+            presolve_warnings.append({
+                'type': 'dag_verwijderd',
+                'dag': day,
+                'reden': 'geen datum in datums'
+            })
+            continue
+        start, end = parse_time(hours[0]), parse_time(hours[1])
+        if start < end:
+            instructor_windows[day] = (start, end)
+
+    students = []
+    capacities = {}
+    days_with_students = set()
+    for student in problem['students']:
+        availability = {}
+        capacity = 0
+        for day, window in student['beschikbaarheid'].items():
+            if not window or len(window) < 2:
+                continue
+            if day not in instructor_windows:
+                presolve_warnings.append({
+                    'type': 'beschikbaarheid_verwijderd',
+                    'studentId': student['id'],
+                    'studentName': student['naam'],
+                    'dag': day,
+                    'reden': 'instructeur niet beschikbaar op deze dag'
+                })
+                continue
+            start = max(parse_time(window[0]), instructor_windows[day][0])
+            end = min(parse_time(window[1]), instructor_windows[day][1])
+            if end - start < student['lesDuur']:
+                presolve_warnings.append({
+                    'type': 'beschikbaarheid_verwijderd',
+                    'studentId': student['id'],
+                    'studentName': student['naam'],
+                    'dag': day,
+                    'reden': 'beschikbaarheid korter dan lesduur binnen de uren van de instructeur'
+                })
+                continue
+            availability[day] = [format_time(start), format_time(end)]
+            capacity += 2 if instructor.get('blokuren', False) and end - start >= 2 * student['lesDuur'] else 1
+        capacities[student['id']] = capacity
+
+        if not availability:
+            presolve_warnings.append({
+                'type': 'leerling_verwijderd',
+                'studentId': student['id'],
+                'studentName': student['naam'],
+                'reden': 'geen enkele dag waarop een les past',
+                'lessen': student['lessenPerWeek']
+            })
+            continue
+
+        reduced_student = dict(student, beschikbaarheid=availability)
+        if student['lessenPerWeek'] > capacity:
+            presolve_warnings.append({
+                'type': 'lessen_begrensd',
+                'studentId': student['id'],
+                'studentName': student['naam'],
+                'van': student['lessenPerWeek'],
+                'naar': capacity
+            })
+            reduced_student['lessenPerWeek'] = capacity
+        students.append(reduced_student)
+        days_with_students.update(availability.keys())
+
+    beschikbare_uren = {}
+    for day, (start, end) in instructor_windows.items():
+        if day not in days_with_students:
+            presolve_warnings.append({
+                'type': 'dag_verwijderd',
+                'dag': day,
+                'reden': 'geen leerlingen beschikbaar'
+            })
+            continue
+        beschikbare_uren[day] = [format_time(start), format_time(end)]
+
+    return dict(
+        problem,
+        instructor=dict(instructor, beschikbareUren=beschikbare_uren),
+        students=students,
+        # Maximum number of lessons per week each student can get on the remaining days
+        capacities=capacities,
+        presolve_warnings=presolve_warnings
+    )
+
+def build_availability_index(problem):
+    """
+    Build per-day availability bitmaps for the students of a (presolved) problem.
+
+    Bit t of a student's mask is set when a lesson of lesDuur minutes can start at
+    minute t of that day. Returns {day: [(student, mask), ...]} in student order.
+    """
+    availability_index = defaultdict(list)
+    for student in problem['students']:
+        if student['lessenPerWeek'] <= 0:
+            continue
+        for day, window in student['beschikbaarheid'].items():
+            first_start = parse_time(window[0])
+            last_start = parse_time(window[1]) - student['lesDuur']
+            if last_start < first_start:
+                continue
+            mask = ((1 << (last_start - first_start + 1)) - 1) << first_start
+            availability_index[day].append((student, mask))
+    return dict(availability_index)
+
+def get_student_coordinates(student):
+    """Return the (lat, lng) pickup location of a student (locatie {"lat", "lng"}), or None when unknown"""
+    locatie = student.get('locatie')
+    if isinstance(locatie, dict) and locatie.get('lat') is not None and locatie.get('lng') is not None:
+        return (float(locatie['lat']), float(locatie['lng']))
+    return None
+
+def estimate_travel_minutes(origin, destination):
+    """Estimate the driving time in minutes between two (lat, lng) coordinates"""
+    lat1, lng1 = map(radians, origin)
+    lat2, lng2 = map(radians, destination)
+    haversine = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    distance_km = 2 * 6371 * asin(sqrt(haversine))
+    return ceil(distance_km * TRAVEL_DETOUR_FACTOR / TRAVEL_SPEED_KMH * 60)
+
+def build_travel_times(problem, cache_dir=TRAVEL_TIME_CACHE_DIR):
+    """
+    Build the student x student travel time matrix for a problem, fully offline.
+
+    Returns {'index': {studentId: row}, 'minutes': [[...]]}, or None when no student
+    has a known location. The matrix is cached on disk, keyed by the location set,
+    with the student ids stored in row order so non-string ids survive the JSON.
+    """
+    locations = [(student['id'], get_student_coordinates(student)) for student in problem['students']]
+
+    if all(coordinates is None for student_id, coordinates in locations):
+        return None
+
+    cache_key = hashlib.sha1(json.dumps(
+        [locations, TRAVEL_DETOUR_FACTOR, TRAVEL_SPEED_KMH, UNKNOWN_TRAVEL_MINUTES]
+    ).encode('utf-8')).hexdigest()
+    cache_file = os.path.join(cache_dir, f"{cache_key}.json")
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        # JSON turns dict keys into strings, so the file holds the ids as a list in row
+        # order (files written with the old index dict are rebuilt)
+        if 'students' in cached:
+            return {
+                'index': {student_id: row for row, student_id in enumerate(cached['students'])},
+                'minutes': cached['minutes']
+            }
+
+    minutes = []
+    for student_id, origin in locations:
+        minutes.append([
+            UNKNOWN_TRAVEL_MINUTES if origin is None or destination is None else estimate_travel_minutes(origin, destination)
+            for other_id, destination in locations
+        ])
+    travel_times = {
+        'index': {student_id: row for row, (student_id, coordinates) in enumerate(locations)},
+        'minutes': minutes
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({'students': [student_id for student_id, coordinates in locations], 'minutes': minutes}, f)
+    return travel_times
+
+def get_travel_minutes(travel_times, from_student_id, to_student_id):
+    """O(1) travel time lookup between two students (pauses and unknown students get the default)"""
+    from_row = travel_times['index'].get(from_student_id)
+    to_row = travel_times['index'].get(to_student_id)
+    if from_row is None or to_row is None:
+        return UNKNOWN_TRAVEL_MINUTES
+    return travel_times['minutes'][from_row][to_row]
+
+def get_chain_travel_minutes(travel_times, day_lessons, student_id, start, end):
+    """
+    Travel time between a student and the lessons around a lesson from start to end:
+    from the previous lesson of the day, or to the next one when it is the first lesson.
+    """
+    previous_lesson = None
+    next_lesson = None
+    for lesson in day_lessons:
+        if lesson['studentId'] in ("PAUSE", "BEZET"):
+            continue
+        if parse_time(lesson['endTime']) <= start:
+            if previous_lesson is None or lesson['endTime'] > previous_lesson['endTime']:
+                previous_lesson = lesson
+        elif parse_time(lesson['startTime']) >= end:
+            if next_lesson is None or lesson['startTime'] < next_lesson['startTime']:
+                next_lesson = lesson
+    if previous_lesson is not None:
+        return get_travel_minutes(travel_times, previous_lesson['studentId'], student_id)
+    if next_lesson is not None:
+        return get_travel_minutes(travel_times, student_id, next_lesson['studentId'])
+    return 0
+
+def prepare_problem(data, settings=None):
+    """Compile, presolve and index the input data so it can be shared by every search run"""
+    problem = presolve_problem(compile_problem(data, settings))
+    problem['availability_index'] = build_availability_index(problem)
+    # Only needed when lessons should be chained by location
+    problem['travel_times'] = build_travel_times(problem) if problem['instructor'].get('locatiesKoppelen', False) else None
+    return problem
+
+def format_presolve_warning(warning):
+    """Format a structured presolve warning as a readable Dutch sentence"""
+    if warning['type'] == 'leerling_verwijderd':
+        return f"{warning['studentName']} verwijderd ({warning['lessen']} les(sen)): {warning['reden']}"
+    if warning['type'] == 'beschikbaarheid_verwijderd':
+        return f"{warning['studentName']} niet ingepland op {warning['dag']}: {warning['reden']}"
+    if warning['type'] == 'lessen_begrensd':
+        return f"{warning['studentName']}: lessen per week begrensd van {warning['van']} naar {warning['naar']}"
+    if warning['type'] == 'dag_verwijderd':
+        return f"{warning['dag'].capitalize()} verwijderd: {warning['reden']}"
+    return str(warning)
+
+def write_report(sink, lessons, week_dates, report_format='text'):
+    """
+    Stream the lessons to a file-like sink day by day in chronological order.
+
+    Lessons are indexed per day once, and block hours are grouped per day up front:
+    a lesson is a block hour when it takes 120 minutes or more, or when the student
+    has more than one lesson that day.
+
+    Args:
+        sink: File-like object with write() (and optionally flush())
+        lessons: Lessons with day_name, including pause lessons
+        week_dates: Mapping of day name to date, in chronological order
+        report_format: 'text' for the readable overview, 'json' for one JSON object per day
+    """
+    lessons_by_day = defaultdict(list)
+    for lesson in lessons:
+        lessons_by_day[lesson['day_name']].append(lesson)
+
+    if report_format == 'text':
+        sink.write("=== LESSEN IN CHRONOLOGISCHE VOLGORDE ===\n")
+
+    for day, date in week_dates.items():
+        day_lessons = sorted(lessons_by_day.get(day, []), key=lambda x: x['startTime'])
+        if not day_lessons:
+            continue
+
+        lessons_per_student = defaultdict(int)
+        for lesson in day_lessons:
+            if lesson['studentId'] != "PAUSE":
+                lessons_per_student[lesson['studentId']] += 1
+
+        report_lessons = []
+        for lesson in day_lessons:
+            is_pause = lesson['studentId'] == "PAUSE"
+            is_block_hour = not is_pause and (
+                parse_time(lesson['endTime']) - parse_time(lesson['startTime']) >= 120 or
+                lessons_per_student[lesson['studentId']] > 1
+            )
+            report_lessons.append((lesson, is_pause, is_block_hour))
+
+        if report_format == 'json':
+            sink.write(json.dumps({
+                "dag": day,
+                "datum": date,
+                "lessen": [
+                    {
+                        "startTime": lesson['startTime'],
+                        "endTime": lesson['endTime'],
+                        "studentId": lesson['studentId'],
+                        "studentName": lesson['studentName'],
+                        "pauze": is_pause,
+                        "blokuur": is_block_hour
+                    }
+                    for lesson, is_pause, is_block_hour in report_lessons
+                ]
+            }, ensure_ascii=False) + "\n")
+        else:
+            day_name = day.capitalize()
+            sink.write("".join(
+                f"{day_name} {lesson['startTime']} - {lesson['endTime']} {lesson['studentName']}{' (blokuur)' if is_block_hour else ''}\n"
+                for lesson, is_pause, is_block_hour in report_lessons
+            ))
+
+        # Make every finished day visible to the reader right away
+        if hasattr(sink, 'flush'):
+            sink.flush()
+
+    if report_format == 'text':
+        sink.write("=== EINDE LESSEN ===\n")
+
+def generate_week_planning(random_week_index, start_vanaf_begin, print_details=True, problem=None, day_order=None, report_sink=None, report_format='text'):
+    """
+    Generate optimized week planning maximizing number of lessons
+
+    Args:
+        random_week_index: Index into day_variations that decides the day order
+        start_vanaf_begin: Whether time slots run from the start or the end of the day
+        print_details: Print the chronological lesson overview and summary
+        problem: A prepared problem (see prepare_problem); loaded from the input file when omitted
+        day_order: Explicit day order, overrides day_variations[random_week_index]
+        report_sink: File-like object the lesson report is written to (default: stdout)
+        report_format: 'text' or 'json' (see write_report)
+    """
+
+    if problem is None:
+        problem = prepare_problem(load_input())
+
+    instructor = problem['instructor']
+    students = problem['students']
+    week_dates = problem['week_dates']
+    availability_index = problem.get('availability_index') or build_availability_index(problem)
+    travel_times = problem.get('travel_times')
+
+    if day_order is None:
+        day_order = day_variations[random_week_index]
+
     lessons = []
     warnings = []
     
@@ -211,6 +563,22 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
     
     # Track used time slots per day to prevent overlaps
     used_time_slots = {day: [] for day in week_dates.keys()}
+
+    # Time that is taken elsewhere (e.g. a shared car in use by another instructor) counts as used
+    for day, intervals in problem.get('blocked', {}).items():
+        for start, end in intervals:
+            used_time_slots[day].append({
+                "date": week_dates[day],
+                "startTime": format_time(start),
+                "endTime": format_time(end),
+                "studentId": "BEZET",
+                "studentName": "Bezet",
+                "notes": ""
+            })
+
+    # Stored lessons that stay as they are (see reserve_kept_lessons) are this instructor's own lessons
+    for day, reserved_lessons in problem.get('reserved', {}).items():
+        used_time_slots[day].extend(reserved_lessons)
     
     # Create all possible time slots with 5-minute intervals
     all_time_slots = []
@@ -234,30 +602,8 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
         
         while (start_vanaf_begin and current_time < instructor_end) or (not start_vanaf_begin and current_time > instructor_start):
             # Find all students available at this time
-            available_students = []
-            
-            for student in students:
-                if (student_lessons[student['id']] < student['lessenPerWeek'] and 
-                    day in student['beschikbaarheid']):
-                    
-                    student_start = parse_time(student['beschikbaarheid'][day][0])
-                    student_end = parse_time(student['beschikbaarheid'][day][1])
-                    
-                    # Check if student can schedule a lesson on this day
-                    can_schedule = False
-                    
-                    # Always try block hours first if possible
-                    if can_schedule_block_hour(student['id'], day, used_time_slots, instructor):
-                        # Can schedule block hour (either single long lesson or multiple consecutive short lessons)
-                        if student_start <= current_time and current_time + student['lesDuur'] <= student_end:
-                            can_schedule = True
-                    elif can_schedule_normal_hour(student['id'], day, used_time_slots, instructor):
-                        # Can schedule normal hour
-                        if student_start <= current_time and current_time + student['lesDuur'] <= student_end:
-                            can_schedule = True
-                    
-                    if can_schedule:
-                        available_students.append(student)
+            # (nothing is scheduled yet, so every student whose window fits can schedule a lesson)
+            available_students = [student for student, mask in availability_index.get(day, []) if mask >> current_time & 1]
             
             if available_students:
                 all_time_slots.append({
@@ -276,7 +622,7 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
     # 1. Day (according to the current week variation)
     # 2. Time (earlier is better)
     # Create a mapping from day names to their position in the current week variation
-    current_day_order = {day: i for i, day in enumerate(day_variations[random_week_index])}
+    current_day_order = {day: i for i, day in enumerate(day_order)}
     all_time_slots.sort(key=lambda x: (current_day_order.get(x['day'], 999), x['time']))
     
     # Greedy algorithm: assign lessons to time slots
@@ -304,12 +650,14 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
         if available_students:
             # Select student with highest priority:
             # 1. Block hours first (highest priority) - students who can schedule block hours
-            # 2. Most remaining lessons (second priority)
+            # 2. Most remaining lessons, where with locatiesKoppelen every TRAVEL_MINUTES_PER_LESSON
+            #    minutes of travel from/to the neighbouring lesson count as one lesson less
             # 3. Student ID for tie-breaking
             selected_student = max(available_students, 
                                  key=lambda s: (
                                      can_schedule_block_hour(s['id'], day, used_time_slots, instructor),  # Block hours first (True > False)
-                                     s['lessenPerWeek'] - student_lessons[s['id']],  # Most remaining lessons
+                                     s['lessenPerWeek'] - student_lessons[s['id']]  # Most remaining lessons
+                                     - (get_chain_travel_minutes(travel_times, used_time_slots[day], s['id'], time, time + s['lesDuur']) / TRAVEL_MINUTES_PER_LESSON if travel_times else 0),  # Geographically chained
                                      s['id']  # Tie-breaker
                                  ))
             
@@ -317,15 +665,20 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
             lesson_end_time = time + selected_student['lesDuur']
             
             # Check if we need to add a long break to prevent 3+ hours of consecutive lessons
-            adjusted_start = add_long_break_if_needed(used_time_slots[day], lesson_start, lesson_end_time, instructor, students)
+            adjusted_start = add_long_break_if_needed(used_time_slots[day], lesson_start, lesson_end_time, instructor, students, print_details)
             
             if adjusted_start != lesson_start:
                 lesson_start = adjusted_start
                 lesson_end_time = adjusted_start + selected_student['lesDuur']
             
+            # A lesson moved by the long break must still fit in the student's window and the instructor's hours
+            overlaps = lesson_end_time > min(
+                parse_time(selected_student['beschikbaarheid'][day][1]),
+                parse_time(instructor['beschikbareUren'][day][1])
+            )
+
             # Check if this time slot would overlap with existing lessons
             # Check for overlaps with existing lessons on this day
-            overlaps = False
             for existing_lesson in used_time_slots[day]:
                 existing_start = parse_time(existing_lesson['startTime'])
                 existing_end = parse_time(existing_lesson['endTime'])
@@ -354,6 +707,10 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
                         if pause_time < instructor['pauzeTussenLessen']:
                             overlaps = True
                             break
+
+            # The long break only moves the lesson later, so the lessons after it can still make the run too long
+            if not overlaps and check_consecutive_lessons_time(used_time_slots[day], lesson_start, lesson_end_time, instructor):
+                overlaps = True
             
             if not overlaps:
                 # Check if we can schedule a block hour (multiple consecutive lessons)
@@ -382,7 +739,7 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
                                 second_overlaps = True
                                 break
                         
-                        if not second_overlaps:
+                        if not second_overlaps and not check_consecutive_lessons_time(used_time_slots[day], lesson_start, second_lesson_end, instructor):
                             lessons_to_schedule = 2
                 
                 # Create lesson(s)
@@ -536,8 +893,14 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
                         continue
                 
                 # Try to fit lesson between existing lessons
-                for i in range(len(day_lessons)):
-                    current_lesson_end = parse_time(day_lessons[i]['endTime'])
+                # (with locatiesKoppelen the gap after the closest lesson is tried first)
+                gap_order = range(len(day_lessons))
+                if travel_times:
+                    gap_order = sorted(gap_order, key=lambda i: get_travel_minutes(travel_times, day_lessons[i]['studentId'], student['id']))
+                # A gap starts after everything before it ends: blocked time can overlap a pause or other blocked time
+                latest_ends = list(accumulate((parse_time(lesson['endTime']) for lesson in day_lessons), max))
+                for i in gap_order:
+                    current_lesson_end = latest_ends[i]
                     
                     if i == len(day_lessons) - 1:
                         # Last lesson of the day, try to fit after it
@@ -551,22 +914,22 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
                         available_start = current_lesson_end
                         available_end = next_start
                     else:
-                        # Normal hour - pause required
+                        # Normal hour - pause required (also before the next lesson)
                         available_start = current_lesson_end + instructor['pauzeTussenLessen']
-                        available_end = next_start
+                        available_end = next_start if i == len(day_lessons) - 1 else next_start - instructor['pauzeTussenLessen']
                     
                     if available_end - available_start >= student['lesDuur']:
                         lesson_start = max(available_start, student_start)
                         lesson_end_time = lesson_start + student['lesDuur']
                         
                         # Check if we need to add a long break
-                        adjusted_start = add_long_break_if_needed(used_time_slots[day], lesson_start, lesson_end_time, instructor, students)
+                        adjusted_start = add_long_break_if_needed(used_time_slots[day], lesson_start, lesson_end_time, instructor, students, print_details)
                         
                         if adjusted_start != lesson_start:
                             lesson_start = adjusted_start
                             lesson_end_time = adjusted_start + student['lesDuur']
                         
-                        if lesson_end_time <= min(available_end, student_end):
+                        if lesson_end_time <= min(available_end, student_end) and not check_consecutive_lessons_time(used_time_slots[day], lesson_start, lesson_end_time, instructor):
                             lesson = {
                                 "date": date,
                                 "startTime": format_time(lesson_start),
@@ -610,52 +973,17 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
                             # print(f"{day_name} {format_time(lesson_start)} - {format_time(lesson_end_time)} {student['naam']}{lesson_type}")
                             break
     
-    # Print all lessons in chronological order from Monday morning to Friday evening
-    if print_details:
-        print("=== LESSEN IN CHRONOLOGISCHE VOLGORDE ===")
-    
-    # Create a mapping from day names to sort order
-    day_order = {'maandag': 1, 'dinsdag': 2, 'woensdag': 3, 'donderdag': 4, 'vrijdag': 5, 'zaterdag': 6, 'zondag': 7}
-    
-    # Add day name to each lesson for sorting
+    # Add day name to each lesson (used by the report and to move lessons to other weeks)
+    date_to_day = {date: day for day, date in week_dates.items()}
     for lesson in lessons:
-        for day, date in week_dates.items():
-            if date == lesson['date']:
-                lesson['day_name'] = day
-                break
-    
-    # Sort lessons by day and time according to the current week variation
-    current_day_order = {day: i for i, day in enumerate(day_variations[random_week_index])}
-    sorted_lessons = sorted(lessons, key=lambda x: (
-        current_day_order.get(x['day_name'], 999),  # Sort by day first
-        x['startTime']  # Then by start time
-    ))
+        lesson['day_name'] = date_to_day[lesson['date']]
     
-    # Print lessons in chronological order
+    # Write all lessons in chronological order from Monday morning to Sunday evening
     if print_details:
-        for lesson in sorted_lessons:
-            day_name = lesson['day_name'].capitalize()
-            
-            # Handle pause lessons
-            if lesson['studentId'] == "PAUSE":
-                print(f"{day_name} {lesson['startTime']} - {lesson['endTime']} {lesson['studentName']}")
-                continue
-            
-            # Determine if this is a block hour
-            lesson_duration = parse_time(lesson['endTime']) - parse_time(lesson['startTime'])
-            
-            # Check if this student has multiple lessons on this day (block hour)
-            day_lessons_for_student = [l for l in sorted_lessons if l['studentId'] == lesson['studentId'] and l['day_name'] == lesson['day_name'] and l['studentId'] != "PAUSE"]
-            is_block_hour = lesson_duration >= 120 or len(day_lessons_for_student) > 1
-            
-            lesson_type = " (blokuur)" if is_block_hour else ""
-            
-            print(f"{day_name} {lesson['startTime']} - {lesson['endTime']} {lesson['studentName']}{lesson_type}")
-        
-        print("=== EINDE LESSEN ===")
+        write_report(report_sink or sys.stdout, lessons, week_dates, report_format)
     
-    # Calculate total required lessons
-    total_required_lessons = sum(student['lessenPerWeek'] for student in students)
+    # Calculate total required lessons (against the original request, not the presolved quotas)
+    total_required_lessons = sum(student['lessenPerWeek'] for student in problem['original_students'])
     total_planned_lessons = len([lesson for lesson in lessons if lesson['studentId'] != "PAUSE"])
     
     # Create summary
@@ -695,9 +1023,9 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
     
     # Check and print students who didn't get their desired number of lessons
     students_with_missing_lessons = []
-    for student in students:
-        if student_lessons[student['id']] < student['lessenPerWeek']:
-            missing_lessons = student['lessenPerWeek'] - student_lessons[student['id']]
+    for student in problem['original_students']:
+        if student_lessons.get(student['id'], 0) < student['lessenPerWeek']:
+            missing_lessons = student['lessenPerWeek'] - student_lessons.get(student['id'], 0)
             students_with_missing_lessons.append((student['naam'], missing_lessons))
             warnings.append(f"Student {student['naam']} heeft nog {missing_lessons} les(sen) nodig")
     
@@ -713,12 +1041,169 @@ def generate_week_planning(random_week_index, start_vanaf_begin, print_details=T
     response = {
         "lessons": lessons,
         "summary": summary,
-        "warnings": warnings
+        "warnings": warnings,
+        "presolve_warnings": problem['presolve_warnings']
     }
     
     return response, total_planned_lessons, total_time_between_lessons, start_vanaf_begin
 
-def create_output_json(best_result, best_week_index, best_start_vanaf_begin, filename="src/app/dashboard/ai-schedule/best_week_planning.json"):
+def normalize_existing_lesson(lesson):
+    """
+    Convert a stored lesson (Supabase row with start_time/student_id, or planner format
+    with startTime/studentId) to the planner format. Times are cut to HH:MM.
+    """
+    return {
+        "id": lesson['id'],
+        "date": lesson['date'],
+        "startTime": lesson.get('startTime', lesson.get('start_time'))[:5],
+        "endTime": lesson.get('endTime', lesson.get('end_time'))[:5],
+        "studentId": lesson.get('studentId', lesson.get('student_id')),
+        "notes": lesson.get('notes') or ""
+    }
+
+def reserve_kept_lessons(problem, existing_lessons):
+    """
+    Reserve the stored lessons of the planned week that create_lesson_diff keeps as they
+    are: completed lessons, and lessons of students that are not in the input. New lessons
+    are planned around them, and a completed lesson counts as one of the student's
+    lessons of this week.
+
+    Returns a new problem with the kept lessons in problem['reserved'] ({day: [lessons]}).
+    """
+    date_to_day = {date: day for day, date in problem['week_dates'].items()}
+    student_ids = {student['id'] for student in problem['original_students']}
+    reserved = defaultdict(list)
+    completed_lessons = defaultdict(int)
+    for existing_lesson in existing_lessons:
+        if existing_lesson.get('status') == 'cancelled' or existing_lesson['date'] not in date_to_day:
+            continue
+        completed = existing_lesson.get('status') == 'completed'
+        lesson = normalize_existing_lesson(existing_lesson)
+        if lesson['studentId'] in student_ids and not completed:
+            continue
+        reserved[date_to_day[lesson['date']]].append(dict(lesson, studentName="Bestaande les"))
+        if lesson['studentId'] in student_ids:
+            completed_lessons[lesson['studentId']] += 1
+
+    quotas = {
+        student['id']: max(0, student['lessenPerWeek'] - completed_lessons[student['id']])
+        for student in problem['original_students']
+    }
+    return dict(with_student_quotas(problem, quotas), reserved=dict(reserved))
+
+def create_lesson_diff(lessons, existing_lessons, tolerance_minutes=60, student_ids=None):
+    """
+    Compare a new planning with the lessons that are already stored and return the
+    minimal set of changes that turns the stored week into the new planning.
+
+    A new lesson keeps the identity (id) of a stored lesson of the same student on the
+    same date whose start time is at most tolerance_minutes away. Closest start times
+    are matched first, so every stored lesson is matched at most once.
+
+    Completed lessons are never updated or deleted: a new lesson that matches one is
+    dropped and the stored lesson is reported as unchanged. Stored lessons of students
+    that are not planned (not in student_ids) are left alone as well.
+
+    Args:
+        lessons: The new lessons in planner format (pause lessons are ignored)
+        existing_lessons: The stored lessons of the same week (cancelled lessons are ignored)
+        tolerance_minutes: Maximum start time difference for a lesson to keep its identity
+        student_ids: The students of the planner input (default: every stored lesson takes part)
+
+    Returns:
+        {"insert": [lessons], "update": [lessons with id], "delete": [ids], "ongewijzigd": [ids],
+         "conflicten": [new or moved lessons that overlap a kept stored lesson]}
+    """
+    existing_by_key = defaultdict(list)
+    # Stored lessons that stay whatever the new planning is
+    kept_lessons = []
+    for existing_lesson in existing_lessons:
+        if existing_lesson.get('status') == 'cancelled':
+            continue
+        completed = existing_lesson.get('status') == 'completed'
+        existing_lesson = normalize_existing_lesson(existing_lesson)
+        if student_ids is not None and existing_lesson['studentId'] not in student_ids:
+            kept_lessons.append(existing_lesson)
+            continue
+        existing_lesson['completed'] = completed
+        if completed:
+            kept_lessons.append(existing_lesson)
+        existing_by_key[(existing_lesson['studentId'], existing_lesson['date'])].append(existing_lesson)
+
+    new_by_key = defaultdict(list)
+    for lesson in lessons:
+        if lesson['studentId'] != "PAUSE":
+            new_by_key[(lesson['studentId'], lesson['date'])].append(lesson)
+
+    diff = {"insert": [], "update": [], "delete": [], "ongewijzigd": []}
+    for key, new_lessons in new_by_key.items():
+        candidates = existing_by_key.pop(key, [])
+
+        # All pairs within the tolerance, closest start (then end) time first
+        pairs = []
+        for new_index, lesson in enumerate(new_lessons):
+            for existing_index, existing_lesson in enumerate(candidates):
+                start_difference = abs(parse_time(lesson['startTime']) - parse_time(existing_lesson['startTime']))
+                if start_difference <= tolerance_minutes:
+                    end_difference = abs(parse_time(lesson['endTime']) - parse_time(existing_lesson['endTime']))
+                    pairs.append((start_difference, end_difference, new_index, existing_index))
+        pairs.sort()
+
+        matched_new = set()
+        matched_existing = set()
+        for start_difference, end_difference, new_index, existing_index in pairs:
+            if new_index in matched_new or existing_index in matched_existing:
+                continue
+            matched_new.add(new_index)
+            matched_existing.add(existing_index)
+            lesson = new_lessons[new_index]
+            existing_lesson = candidates[existing_index]
+            if (start_difference == 0 and end_difference == 0) or existing_lesson['completed']:
+                diff["ongewijzigd"].append(existing_lesson['id'])
+            else:
+                diff["update"].append({
+                    "id": existing_lesson['id'],
+                    "date": lesson['date'],
+                    "startTime": lesson['startTime'],
+                    "endTime": lesson['endTime'],
+                    "studentId": lesson['studentId'],
+                    "studentName": lesson['studentName'],
+                    "notes": existing_lesson['notes']
+                })
+
+        for new_index, lesson in enumerate(new_lessons):
+            if new_index not in matched_new:
+                diff["insert"].append({
+                    "date": lesson['date'],
+                    "startTime": lesson['startTime'],
+                    "endTime": lesson['endTime'],
+                    "studentId": lesson['studentId'],
+                    "studentName": lesson['studentName'],
+                    "notes": ""
+                })
+        diff["delete"].extend(
+            existing_lesson['id'] for existing_index, existing_lesson in enumerate(candidates)
+            if existing_index not in matched_existing and not existing_lesson['completed']
+        )
+
+    # Stored lessons of students/dates that are not in the new planning at all
+    for candidates in existing_by_key.values():
+        diff["delete"].extend(existing_lesson['id'] for existing_lesson in candidates if not existing_lesson['completed'])
+
+    # New or moved lessons on top of a kept lesson would book the instructor twice
+    # (the planner avoids this when the kept lessons are reserved, see reserve_kept_lessons)
+    diff["conflicten"] = [
+        {"id": kept_lesson['id'], "date": lesson['date'], "startTime": lesson['startTime'], "endTime": lesson['endTime'], "studentId": lesson['studentId']}
+        for lesson in diff["insert"] + diff["update"]
+        for kept_lesson in kept_lessons
+        if kept_lesson['date'] == lesson['date'] and kept_lesson['id'] != lesson.get('id')
+        and parse_time(lesson['startTime']) < parse_time(kept_lesson['endTime'])
+        and parse_time(kept_lesson['startTime']) < parse_time(lesson['endTime'])
+    ]
+
+    return diff
+
+def create_output_json(best_result, best_week_index, best_start_vanaf_begin, filename="src/app/dashboard/ai-schedule/best_week_planning.json", input_filename='scripts/sample_input.json', existing_lessons=None):
     """
     Create a JSON file in the exact format of sample_output.json from the best week planning results.
     
@@ -727,10 +1212,12 @@ def create_output_json(best_result, best_week_index, best_start_vanaf_begin, fil
         best_week_index: The index of the best week variation
         best_start_vanaf_begin: Whether the best option started from beginning
         filename: The output filename (default: best_week_planning.json)
+        input_filename: The input file the planning was generated from
+        existing_lessons: The currently stored lessons; when given, a "diff" against the
+            stored lessons of this week is written instead of the full "lessons" array
     """
     # Load input data to get student information
-    with open('scripts/sample_input.json', 'r', encoding='utf-8') as f:
-        input_data = json.load(f)
+    input_data = load_input(input_filename)
     
     students = input_data['leerlingen']
     
@@ -802,8 +1289,18 @@ def create_output_json(best_result, best_week_index, best_start_vanaf_begin, fil
         "schedule_details": {
             "lessen": len(formatted_lessons),
             "totale_minuten_tussen_lessen": total_time_between_lessons
-        }
+        },
+        "presolve_waarschuwingen": best_result.get('presolve_warnings', [])
     }
+
+    if existing_lessons is not None:
+        # Only the stored lessons of the planned week take part in the diff
+        week_dates = set(input_data['instructeur']['datums'])
+        week_existing_lessons = [lesson for lesson in existing_lessons if lesson['date'] in week_dates]
+        student_ids = {student['id'] for student in input_data['leerlingen']}
+        diff = create_lesson_diff(formatted_lessons, week_existing_lessons, student_ids=student_ids)
+        del output_data['lessons']
+        output_data['diff'] = diff
     
     # Write to JSON file
     with open(filename, 'w', encoding='utf-8') as f:
@@ -811,53 +1308,123 @@ def create_output_json(best_result, best_week_index, best_start_vanaf_begin, fil
     
     print(f"JSON bestand '{filename}' succesvol aangemaakt!")
     print(f"Aantal lessen: {len(formatted_lessons)}")
+    if existing_lessons is not None:
+        print(f"Wijzigingen: {len(diff['insert'])} nieuw, {len(diff['update'])} aangepast, "
+              f"{len(diff['delete'])} verwijderd, {len(diff['ongewijzigd'])} ongewijzigd")
+        if diff['conflicten']:
+            print(f"LET OP: {len(diff['conflicten'])} nieuwe of verplaatste lessen overlappen een bestaande les")
     print(f"Totale minuten tussen lessen: {total_time_between_lessons}")
     print(f"Leerlingen zonder voldoende lessen: {len(students_without_lessons)}")
 
-if __name__ == "__main__":
-    print("=== VERGELIJKING VAN 20 VERSCHILLENDE DAG VOLGORDES ===")
-    print()
+def new_seed():
+    """Pick a fresh seed for a search run (printed, so the run can be reproduced)"""
+    return random.SystemRandom().randrange(2**32)
 
-    days = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
-    list_available_days_integers = []
-    # Read on which days the instructor is available
-    for i in range(7):
-        # read json file 
-        with open('scripts/sample_input.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        if(days[i] in data['instructeur']['beschikbareUren']):
-            if(len(data['instructeur']['beschikbareUren'][days[i]]) > 0):
-                list_available_days_integers.append(i)
+def variation_rng(seed, variation_index):
+    """
+    The random stream of one variation. Every variation has its own stream derived from
+    the run seed, so a variation is the same no matter which worker (or resumed run)
+    generates it, or in which order.
+    """
+    return random.Random(f"{seed}-{variation_index}")
 
-    print(list_available_days_integers)
-    total_combinations = factorial(len(list_available_days_integers))
-    print(f"Aantal mogelijke combinaties: {total_combinations}")
-    available_days = len(list_available_days_integers)
-    # Add every single combination of days
-    for combination_index in range(min(100, total_combinations)):
-        remaining_days = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
-        new_combination = []
-        for day_index in range(7):
-            selected_day = remaining_days[random.randint(0, len(remaining_days)-1)]
-            new_combination.append(selected_day)
-            remaining_days.remove(selected_day)
-        day_variations.append(new_combination)
-        print(f"Combinatie {combination_index + 1}: {new_combination}")
-    
+def seeded_day_variations(seed, random_count):
+    """
+    Create the day orders and start_vanaf_begin values of a search run: the fixed
+    day_variations followed by random_count random day orders (permutations of the week).
+
+    Returns:
+        (variations, start_options)
+    """
+    variations = []
+    start_options = []
+    for variation_index in range(7 + random_count):
+        rng = variation_rng(seed, variation_index)
+        if variation_index < 7:
+            variations.append(day_variations[variation_index])
+        else:
+            variations.append(rng.sample(['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag'], 7))
+        start_options.append(rng.random() < 0.5)
+    return variations, start_options
+
+def get_search_key(problem, variations, start_options):
+    """Identify a search (input, settings and variations) so a checkpoint can't be resumed on another search"""
+    return hashlib.sha1(json.dumps(
+        [problem['original_students'], problem['instructor'], problem.get('blocked'), problem.get('reserved'), variations, start_options],
+        sort_keys=True
+    ).encode('utf-8')).hexdigest()
+
+def load_search_checkpoint(checkpoint_file, search_key):
+    """Load a search checkpoint, or None when there is none for this search"""
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('search_key') != search_key:
+        return None
+    return checkpoint
+
+def save_search_checkpoint(checkpoint_file, checkpoint):
+    """Write a search checkpoint atomically, so a killed run never leaves a half-written file"""
+    temporary_file = f"{checkpoint_file}.tmp"
+    with open(temporary_file, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary_file, checkpoint_file)
+
+def search_best_week_planning(problem, variations, start_options, print_progress=False, checkpoint_file=None, checkpoint_every=10):
+    """
+    Run generate_week_planning for every day order variation and pick the best option.
+    The best option has the most lessons, with the least time between lessons as tiebreaker.
+
+    Args:
+        problem: A prepared problem (see prepare_problem)
+        variations: List of day orders to try
+        start_options: start_vanaf_begin value for each variation
+        print_progress: Print a line per option
+        checkpoint_file: Persist the explored variations and the best option so far to this
+            file, and resume from it when it belongs to the same search
+        checkpoint_every: Number of variations between two checkpoints
+
+    Returns:
+        (best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results)
+        where results is a list of (index, score, total_time_between_lessons, result);
+        result is None for variations that were explored before a resume
+    """
     results = []
     highest_score = 0
     best_week_index = 0
     best_rest_time = float('inf')  # Initialize with infinity for tiebreaker
     best_start_vanaf_begin = False
-    for i in range(len(day_variations)):
-        print(f"--- OPTIE {i+1} ---")
-        # Get the first 5 days from each variation (work week)
-        day_order = day_variations[i]
-        print(f"Dag volgorde: {day_order}")
-        print()
-        random_start_vanaf_begin = [True, False][random.randint(0, 1)]
 
-        result, score, total_time_between_lessons, start_vanaf_begin = generate_week_planning(i, random_start_vanaf_begin, print_details=False)
+    search_key = get_search_key(problem, variations, start_options) if checkpoint_file else None
+    checkpoint = load_search_checkpoint(checkpoint_file, search_key)
+    explored = {}
+    if checkpoint is not None:
+        explored = {int(i): (score, rest_time) for i, score, rest_time in checkpoint['explored']}
+        if checkpoint['best'] is not None:
+            best_week_index, highest_score, best_rest_time, best_start_vanaf_begin = checkpoint['best']
+        if print_progress:
+            print(f"Checkpoint gevonden: {len(explored)} van {len(variations)} opties al bekeken")
+            print()
+
+    def write_checkpoint():
+        save_search_checkpoint(checkpoint_file, {
+            'search_key': search_key,
+            'explored': [[i, score, rest_time] for i, (score, rest_time) in sorted(explored.items())],
+            'best': [best_week_index, highest_score, best_rest_time, best_start_vanaf_begin] if best_rest_time != float('inf') else None
+        })
+
+    for i, (day_order, option_start_vanaf_begin) in enumerate(zip(variations, start_options)):
+        if i in explored:
+            results.append((i, explored[i][0], explored[i][1], None))
+            continue
+
+        if print_progress:
+            print(f"--- OPTIE {i+1} ---")
+            print(f"Dag volgorde: {day_order}")
+            print()
+
+        result, score, total_time_between_lessons, start_vanaf_begin = generate_week_planning(i, option_start_vanaf_begin, print_details=False, problem=problem, day_order=day_order)
         results.append((i, score, total_time_between_lessons, result))
         
         # Update best option: prioritize number of lessons, then use rest time as tiebreaker
@@ -867,15 +1434,514 @@ if __name__ == "__main__":
             best_rest_time = total_time_between_lessons
             best_start_vanaf_begin = start_vanaf_begin
         
-        print(f"Optie {i+1}: {score} lessen ingepland")
-        print("="*50)
+        if print_progress:
+            print(f"Optie {i+1}: {score} lessen ingepland")
+            print("="*50)
+            print()
+
+        if checkpoint_file:
+            explored[i] = (score, total_time_between_lessons)
+            if len(explored) % checkpoint_every == 0:
+                write_checkpoint()
+
+    if checkpoint_file:
+        write_checkpoint()
+
+    return best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results
+
+def search_best_week_planning_parallel(executor, problem, variations, start_options, chunk_size=16):
+    """
+    Same as search_best_week_planning, but the variations are split into chunks that
+    are searched in the worker processes of executor. The chunks are merged in order,
+    so the chosen option is identical to a sequential search.
+    """
+    futures = []
+    for offset in range(0, len(variations), chunk_size):
+        futures.append((offset, executor.submit(
+            search_best_week_planning,
+            problem,
+            variations[offset:offset + chunk_size],
+            start_options[offset:offset + chunk_size]
+        )))
+
+    results = []
+    highest_score = 0
+    best_week_index = 0
+    best_rest_time = float('inf')
+    best_start_vanaf_begin = False
+    for offset, future in futures:
+        chunk_best_index, chunk_score, chunk_rest_time, chunk_start_vanaf_begin, chunk_results = future.result()
+        results.extend((offset + i, score, rest_time, result) for i, score, rest_time, result in chunk_results)
+        if chunk_score > highest_score or (chunk_score == highest_score and chunk_rest_time < best_rest_time):
+            highest_score = chunk_score
+            best_week_index = offset + chunk_best_index
+            best_rest_time = chunk_rest_time
+            best_start_vanaf_begin = chunk_start_vanaf_begin
+
+    return best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results
+
+def shift_week_dates(week_dates, weeks):
+    """Move every date of a week_dates mapping the given number of weeks forward"""
+    return {
+        day: (datetime.strptime(date, '%Y-%m-%d') + timedelta(weeks=weeks)).strftime('%Y-%m-%d')
+        for day, date in week_dates.items()
+    }
+
+def with_student_quotas(problem, quotas):
+    """
+    Return a copy of a prepared problem where every student requests quotas[id] lessons.
+    The planner quota is capped at the student's weekly capacity, and the availability
+    bitmaps are reused as they are (only the student dictionaries are swapped).
+    """
+    original_students = [dict(student, lessenPerWeek=quotas[student['id']]) for student in problem['original_students']]
+    students = {
+        student['id']: dict(student, lessenPerWeek=min(quotas[student['id']], problem['capacities'][student['id']]))
+        for student in problem['students']
+    }
+    availability_index = {
+        day: [(students[student['id']], mask) for student, mask in entries if students[student['id']]['lessenPerWeek'] > 0]
+        for day, entries in problem['availability_index'].items()
+    }
+    return dict(
+        problem,
+        original_students=original_students,
+        students=list(students.values()),
+        availability_index=availability_index
+    )
+
+def plan_horizon(data, weeks, variations=None, start_options=None, settings=None, rollover=True, max_workers=None):
+    """
+    Plan several consecutive weeks in one call.
+
+    The input is prepared once (presolve and availability bitmaps) and reused for
+    every week, because the availability recurs weekly. With rollover, the lessons a
+    student falls short in one week are added to their request for the next week, as
+    far as they fit in the student's weekly capacity.
+    Weeks with the same requests have the same planning, so each distinct set of
+    requests is searched only once and the other weeks get the dates moved. Every
+    search is spread over worker processes.
+
+    Args:
+        data: The parsed input JSON (instructeur + leerlingen); datums is the first week
+        weeks: Number of weeks to plan
+        variations: Day orders to try for every week
+        start_options: start_vanaf_begin per variation
+        settings: AI settings that override the instructor settings (default: from environment)
+        rollover: Carry shortfalls forward to the next week
+        max_workers: Maximum number of worker processes
+
+    Returns:
+        (week_results, students_without_lessons) where week_results has one dict per week
+    """
+    problem = prepare_problem(data, settings)
+    if variations is None:
+        variations = day_variations[:7] * 2
+        start_options = [True] * 7 + [False] * 7
+    elif start_options is None:
+        start_options = [True] * len(variations)
+
+    base_quotas = {student['id']: student['lessenPerWeek'] for student in problem['original_students']}
+    carried = {student_id: 0 for student_id in base_quotas}
+    total_missing = defaultdict(int)
+    searched = {}
+    week_results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for week in range(weeks):
+            quotas = {student_id: base_quotas[student_id] + carried[student_id] for student_id in base_quotas}
+            week_problem = with_student_quotas(problem, quotas)
+            week_dates = shift_week_dates(problem['week_dates'], week)
+
+            quota_key = tuple(sorted(quotas.items()))
+            if quota_key not in searched:
+                searched[quota_key] = search_best_week_planning_parallel(executor, week_problem, variations, start_options)
+            best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = searched[quota_key]
+
+            # generate_week_planning stamps day_name on every lesson, which maps it onto this week's dates
+            week_lessons = [
+                dict(lesson, date=week_dates[lesson['day_name']])
+                for lesson in results[best_week_index][3]['lessons']
+                if lesson['studentId'] != "PAUSE"
+            ]
+            planned = defaultdict(int)
+            for lesson in week_lessons:
+                planned[lesson['studentId']] += 1
+            # The new shortfall of this week against the regular request; what was carried
+            # into this week is reported separately, so shortfalls are not counted twice
+            students_without_lessons = {
+                student['naam']: base_quotas[student['id']] - planned[student['id']]
+                for student in problem['original_students']
+                if base_quotas[student['id']] > planned[student['id']]
+            }
+            carried_in = {
+                student['naam']: carried[student['id']]
+                for student in problem['original_students']
+                if carried[student['id']] > 0
+            }
+            for student_id in base_quotas:
+                missing_lessons = max(0, quotas[student_id] - planned[student_id])
+                if rollover:
+                    # Only carry what still fits next week next to the regular request; the
+                    # rest can never be planned and would otherwise pile up week after week
+                    capacity = problem['capacities'].get(student_id, 0)
+                    carried[student_id] = min(missing_lessons, max(0, capacity - base_quotas[student_id]))
+                    total_missing[student_id] += missing_lessons - carried[student_id]
+                else:
+                    total_missing[student_id] += missing_lessons
+
+            week_results.append({
+                "week": week + 1,
+                "datums": list(week_dates.values()),
+                "lessons": sorted(
+                    ({key: lesson[key] for key in ("date", "startTime", "endTime", "studentId", "studentName", "notes")}
+                     for lesson in week_lessons),
+                    key=lambda x: (x['date'], x['startTime'])
+                ),
+                "lessen": highest_score,
+                "totale_minuten_tussen_lessen": best_rest_time,
+                "leerlingen_zonder_les": students_without_lessons,
+                "doorgeschoven": carried_in
+            })
+
+    # With rollover, the lessons still carried after the last week are missing as well
+    outstanding = {student_id: total_missing[student_id] + (carried[student_id] if rollover else 0) for student_id in base_quotas}
+    students_without_lessons = {
+        student['naam']: outstanding[student['id']]
+        for student in problem['original_students']
+        if outstanding[student['id']] > 0
+    }
+    return week_results, students_without_lessons
+
+def get_students_without_lessons(problem, lessons):
+    """Return {studentName: missing lessons} for students that didn't get their requested number of lessons"""
+    planned = defaultdict(int)
+    for lesson in lessons:
+        if lesson['studentId'] != "PAUSE":
+            planned[lesson['studentId']] += 1
+
+    students_without_lessons = {}
+    for student in problem['original_students']:
+        missing_lessons = student['lessenPerWeek'] - planned[student['id']]
+        if missing_lessons > 0:
+            students_without_lessons[student['naam']] = missing_lessons
+    return students_without_lessons
+
+def get_day_capacities(problem):
+    """
+    Return {studentId: {day: max lessons}} for a presolved problem: two on days where
+    a block hour fits in the student's window, otherwise one.
+    """
+    block_hours = problem['instructor'].get('blokuren', False)
+    day_capacities = {}
+    for student in problem['students']:
+        day_capacities[student['id']] = {}
+        for day, window in student['beschikbaarheid'].items():
+            window_length = parse_time(window[1]) - parse_time(window[0])
+            day_capacities[student['id']][day] = 2 if block_hours and window_length >= 2 * student['lesDuur'] else 1
+    return day_capacities
+
+def restrict_to_day(problem, day, day_quotas):
+    """
+    Return the subproblem of a prepared problem for a single day, where each student
+    requests day_quotas[id] lessons (students without a quota are left out).
+    """
+    students = {
+        student['id']: dict(student, lessenPerWeek=day_quotas[student['id']], beschikbaarheid={day: student['beschikbaarheid'][day]})
+        for student in problem['students']
+        if day_quotas.get(student['id'], 0) > 0
+    }
+    return dict(
+        problem,
+        instructor=dict(problem['instructor'], beschikbareUren={day: problem['instructor']['beschikbareUren'][day]}),
+        students=list(students.values()),
+        original_students=list(students.values()),
+        availability_index={
+            day: [(students[student['id']], mask) for student, mask in problem['availability_index'].get(day, []) if student['id'] in students]
+        }
+    )
+
+def get_day_variants(day_problem):
+    """
+    Return the variants of a single-day subproblem that are searched: as requested,
+    with every block hour split into single lessons, and, when the requested lessons
+    don't fit in the instructor's hours, once without each of the students.
+    """
+    students = day_problem['original_students']
+    variants = [day_problem]
+    if any(student['lessenPerWeek'] > 1 for student in students):
+        # A block hour takes the day's time first; single lessons sometimes fit more students
+        variants.append(with_student_quotas(day_problem, {student['id']: 1 for student in students}))
+
+    hours = next(iter(day_problem['instructor']['beschikbareUren'].values()))
+    requested_minutes = sum(student['lessenPerWeek'] * (student['lesDuur'] + day_problem['instructor']['pauzeTussenLessen']) for student in students)
+    if requested_minutes > parse_time(hours[1]) - parse_time(hours[0]):
+        # The greedy order decides who is left out of a full day; leaving out someone else can fit more
+        for left_out in students:
+            variants.append(with_student_quotas(day_problem, {
+                student['id']: 0 if student['id'] == left_out['id'] else student['lessenPerWeek'] for student in students
+            }))
+    return variants
+
+def solve_day(day_problem):
+    """Plan a single-day subproblem in both directions and return (lessons, score, total_time_between_lessons) of the best"""
+    best = None
+    for start_vanaf_begin in (True, False):
+        result, score, total_time_between_lessons, start_vanaf_begin = generate_week_planning(0, start_vanaf_begin, print_details=False, problem=day_problem)
+        if best is None or score > best[1] or (score == best[1] and total_time_between_lessons < best[2]):
+            best = (result['lessons'], score, total_time_between_lessons)
+    return best
+
+def count_lessons_per_day(day_lessons):
+    """Return {studentId: {day: planned lessons}} for {day: lessons}"""
+    planned = defaultdict(lambda: defaultdict(int))
+    for day, lessons in day_lessons.items():
+        for lesson in lessons:
+            if lesson['studentId'] != "PAUSE":
+                planned[lesson['studentId']][day] += 1
+    return planned
+
+def solve_week_by_days(problem, max_workers=None, max_rounds=20, patience=3, variations=None, start_options=None, max_day_failures=2):
+    """
+    Improve a full-week plan by re-solving single days concurrently.
+
+    Days only interact through each student's weekly quota (and the one lesson or
+    block hour per day rule, which a day quota of at most two already enforces). The
+    loop starts from the best full-week plan over variations, searched in chunks over
+    the worker pool, and uses its lessons per day as the day quotas. Every round:
+
+    - the variants of the changed days (see get_day_variants) are solved
+      concurrently, and every day keeps its best variant;
+    - a student planned above their weekly quota loses the extra lessons on the days
+      with the most of their lessons, and those days are solved again;
+    - every lesson a student is still missing is offered on each of their days with
+      room left. A (student, day) pair drops out after max_day_failures rounds in
+      which the day couldn't fit the lesson, so a lesson can return to a day it left.
+
+    A round without extra lessons counts as a plan, and the loop stops after patience
+    plans without improvement. The starting plan is kept when no round beats it.
+
+    Returns:
+        (result, total_planned_lessons, total_time_between_lessons) like generate_week_planning
+    """
+    days = [day for day in problem['week_dates'] if day in problem['instructor']['beschikbareUren']]
+    day_capacities = get_day_capacities(problem)
+    quotas = {student['id']: student['lessenPerWeek'] for student in problem['students']}
+
+    if variations is None:
+        variations = day_variations[:7] * 2
+        start_options = [True] * 7 + [False] * 7
+    elif start_options is None:
+        start_options = [True] * len(variations)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = search_best_week_planning_parallel(
+            executor, problem, variations, start_options, chunk_size=2
+        )
+        start_lessons = defaultdict(list)
+        for lesson in results[best_week_index][3]['lessons']:
+            start_lessons[lesson['day_name']].append(lesson)
+        best = (start_lessons, highest_score, best_rest_time)
+
+        planned = count_lessons_per_day(start_lessons)
+        allocation = {student_id: defaultdict(int, planned[student_id]) for student_id in quotas}
+        failures = defaultdict(int)
+        day_solutions = {}
+        changed_days = set(days)
+        rounds_without_improvement = 0
+
+        for round_index in range(max_rounds):
+            # Every variant of every changed day is a task of its own, so a round takes as
+            # long as the slowest single-day greedy pass with enough workers
+            variant_days, variants = [], []
+            for day in days:
+                if day in changed_days:
+                    day_problem = restrict_to_day(problem, day, {student_id: student_allocation[day] for student_id, student_allocation in allocation.items() if student_allocation[day] > 0})
+                    for variant in get_day_variants(day_problem):
+                        variant_days.append(day)
+                        variants.append(variant)
+            for day in set(variant_days):
+                day_solutions.pop(day, None)
+            for day, solution in zip(variant_days, executor.map(solve_day, variants, chunksize=4)):
+                best_solution = day_solutions.get(day)
+                if best_solution is None or solution[1] > best_solution[1] or (solution[1] == best_solution[1] and solution[2] < best_solution[2]):
+                    day_solutions[day] = solution
+            planned = count_lessons_per_day({day: solution[0] for day, solution in day_solutions.items()})
+
+            # Trim the lessons above a student's weekly quota (the capped day variant can plan
+            # two single lessons for a block hour that another day already fits)
+            changed_days = set()
+            for student_id, quota in quotas.items():
+                extra_lessons = sum(planned[student_id].values()) - quota
+                for day in sorted(planned[student_id], key=lambda d: (planned[student_id][d], days.index(d)), reverse=True):
+                    while extra_lessons > 0 and planned[student_id][day] > 0:
+                        planned[student_id][day] -= 1
+                        extra_lessons -= 1
+                        changed_days.add(day)
+
+            for student_id, student_allocation in allocation.items():
+                for day in days:
+                    if planned[student_id][day] < student_allocation[day]:
+                        failures[(student_id, day)] += 1
+                    student_allocation[day] = planned[student_id][day]
+
+            if not changed_days:
+                score = sum(solution[1] for solution in day_solutions.values())
+                total_time_between_lessons = sum(solution[2] for solution in day_solutions.values())
+                if score > best[1] or (score == best[1] and total_time_between_lessons < best[2]):
+                    best = ({day: solution[0] for day, solution in day_solutions.items()}, score, total_time_between_lessons)
+                    rounds_without_improvement = 0
+                else:
+                    rounds_without_improvement += 1
+                    if rounds_without_improvement >= patience:
+                        break
+
+            for student_id, quota in quotas.items():
+                if sum(allocation[student_id].values()) >= quota:
+                    continue
+                for day, capacity in day_capacities[student_id].items():
+                    if allocation[student_id][day] < capacity and failures[(student_id, day)] < max_day_failures:
+                        allocation[student_id][day] += 1
+                        changed_days.add(day)
+
+            if not changed_days:
+                break
+
+    day_lessons, total_planned_lessons, total_time_between_lessons = best
+    lessons = [lesson for day in days for lesson in day_lessons.get(day, [])]
+
+    total_required_lessons = sum(student['lessenPerWeek'] for student in problem['original_students'])
+    warnings = [
+        f"Student {student_name} heeft nog {missing_lessons} les(sen) nodig"
+        for student_name, missing_lessons in get_students_without_lessons(problem, lessons).items()
+    ]
+    result = {
+        "lessons": lessons,
+        "summary": f"Planning voor komende week: {total_planned_lessons}/{total_required_lessons} lessen ingepland",
+        "warnings": warnings,
+        "presolve_warnings": problem['presolve_warnings']
+    }
+    return result, total_planned_lessons, total_time_between_lessons
+
+def evaluate_settings_variant(problem, variations, start_options):
+    """Search the best planning for one settings variant and summarize it (runs in a worker process)"""
+    best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = search_best_week_planning(problem, variations, start_options)
+    best_result = results[best_week_index][3]
+    return {
+        "instellingen": {key: problem['instructor'][key] for key in get_settings_from_env()},
+        "lessen": highest_score,
+        "totale_minuten_tussen_lessen": best_rest_time,
+        "leerlingen_zonder_les": get_students_without_lessons(problem, best_result['lessons']),
+        "dag_volgorde": variations[best_week_index],
+        "start_vanaf_begin": best_start_vanaf_begin
+    }
+
+def evaluate_settings_variants(data, variants, variations=None, start_options=None, max_workers=None):
+    """
+    Evaluate a list of instructor settings variants on one input in a single call.
+
+    The input is parsed, presolved and indexed once and shared by every variant
+    (presolve only depends on blokuren and the travel times on locatiesKoppelen, so at
+    most four prepared problems are built).
+    Variants are searched in parallel worker processes over the same day order
+    variations, so their results are directly comparable.
+
+    Args:
+        data: The parsed input JSON (instructeur + leerlingen)
+        variants: List of partial settings dicts, e.g. [{'pauzeTussenLessen': 10}, {'blokuren': False}]
+        variations: Day orders to try (default: every fixed day variation)
+        start_options: start_vanaf_begin per variation (default: both directions for every variation)
+        max_workers: Maximum number of worker processes
+
+    Returns:
+        One summary dict per variant, in the order of variants
+    """
+    if variations is None:
+        variations = day_variations[:7] * 2
+        start_options = [True] * 7 + [False] * 7
+    elif start_options is None:
+        start_options = [True] * len(variations)
+
+    base_settings = get_settings_from_env()
+    prepared_problems = {}
+    variant_problems = []
+    for variant in variants:
+        settings = dict(base_settings, **variant)
+        problem_key = (settings['blokuren'], settings['locatiesKoppelen'])
+        if problem_key not in prepared_problems:
+            prepared_problems[problem_key] = prepare_problem(data, settings)
+        shared_problem = prepared_problems[problem_key]
+        variant_problems.append(dict(shared_problem, instructor=dict(shared_problem['instructor'], **settings)))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            evaluate_settings_variant,
+            variant_problems,
+            [variations] * len(variant_problems),
+            [start_options] * len(variant_problems)
+        ))
+
+def load_existing_lessons(filename):
+    """Load stored lessons from a JSON file (a list of lessons or {"lessons": [...]})"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        existing_lessons = json.load(f)
+    if isinstance(existing_lessons, dict):
+        existing_lessons = existing_lessons['lessons']
+    return existing_lessons
+
+def open_report_sink(report_filename):
+    """Open the file the lesson report is streamed to (stdout when no filename is given)"""
+    if report_filename:
+        return open(report_filename, 'w', encoding='utf-8')
+    return sys.stdout
+
+def run_week_planning(input_filename, existing_lessons_filename=None, report_filename=None, report_format='text', seed=None, checkpoint_file=None):
+    """
+    Search the best day order for the input file and write best_week_planning.json.
+    With existing_lessons_filename the output holds a diff against the stored lessons,
+    and with report_filename the lesson report is streamed to that file. The same seed
+    gives the same planning; with checkpoint_file an interrupted search is resumed.
+    """
+    if seed is None:
+        seed = new_seed()
+
+    print("=== VERGELIJKING VAN 20 VERSCHILLENDE DAG VOLGORDES ===")
+    print()
+
+    # Load, compile and presolve the input once; every variation works on the reduced problem
+    problem = prepare_problem(load_input(input_filename))
+    existing_lessons = load_existing_lessons(existing_lessons_filename) if existing_lessons_filename else None
+    if existing_lessons is not None:
+        problem = reserve_kept_lessons(problem, existing_lessons)
+    if problem['presolve_warnings']:
+        print(f"Presolve: {len(problem['presolve_warnings'])} onderdelen verwijderd of begrensd")
+        for warning in problem['presolve_warnings']:
+            print(f"  - {format_presolve_warning(warning)}")
         print()
+
+    days = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
+    list_available_days_integers = []
+    # Read on which days the instructor is available
+    for i in range(7):
+        if(days[i] in problem['instructor']['beschikbareUren']):
+            if(len(problem['instructor']['beschikbareUren'][days[i]]) > 0):
+                list_available_days_integers.append(i)
+
+    print(list_available_days_integers)
+    total_combinations = factorial(len(list_available_days_integers))
+    print(f"Aantal mogelijke combinaties: {total_combinations}")
+    print(f"Seed: {seed}")
+    # Add every single combination of days
+    variations, start_options = seeded_day_variations(seed, min(100, total_combinations))
+    for combination_index, new_combination in enumerate(variations[7:]):
+        print(f"Combinatie {combination_index + 1}: {new_combination}")
+    
+    best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = search_best_week_planning(problem, variations, start_options, print_progress=True, checkpoint_file=checkpoint_file)
     
     print("=== SAMENVATTING VAN ALLE OPTIES ===")
     print()
     
     for i, score, total_time_between_lessons, result in results:
-        day_order = day_variations[i]
+        day_order = variations[i]
         print(f"Optie {i+1} ({' -> '.join(day_order)}): {score} lessen, {total_time_between_lessons} minuten rust")
     
     print()
@@ -886,13 +1952,139 @@ if __name__ == "__main__":
     
     # Show details of the best option
     print(f"Optie {best_week_index+1} details:")
-    print(f"Dag volgorde: {day_variations[best_week_index]}")
+    print(f"Dag volgorde: {variations[best_week_index]}")
     print(f"Start vanaf begin: {best_start_vanaf_begin}")
     print()
     
     # Re-run the best option with details
-    best_result, best_score, best_rest_time, best_start_vanaf_begin = generate_week_planning(best_week_index, best_start_vanaf_begin, print_details=True)
+    report_sink = open_report_sink(report_filename)
+    try:
+        best_result, best_score, best_rest_time, best_start_vanaf_begin = generate_week_planning(best_week_index, best_start_vanaf_begin, print_details=True, problem=problem, day_order=variations[best_week_index], report_sink=report_sink, report_format=report_format)
+    finally:
+        if report_sink is not sys.stdout:
+            report_sink.close()
     
     # Create JSON output file
     print("\n=== JSON BESTAND AANMAKEN ===")
-    create_output_json(best_result, best_week_index, best_start_vanaf_begin)
+    create_output_json(best_result, best_week_index, best_start_vanaf_begin, input_filename=input_filename, existing_lessons=existing_lessons)
+
+def run_day_planning(input_filename, existing_lessons_filename=None, report_filename=None, report_format='text'):
+    """
+    Plan the week with the day-decomposed solver (see solve_week_by_days) and write
+    best_week_planning.json. With existing_lessons_filename the output holds a diff,
+    and with report_filename the lesson report is streamed to that file.
+    """
+    print("=== PLANNING PER DAG ===")
+    print()
+
+    problem = prepare_problem(load_input(input_filename))
+    existing_lessons = load_existing_lessons(existing_lessons_filename) if existing_lessons_filename else None
+    if existing_lessons is not None:
+        problem = reserve_kept_lessons(problem, existing_lessons)
+    if problem['presolve_warnings']:
+        print(f"Presolve: {len(problem['presolve_warnings'])} onderdelen verwijderd of begrensd")
+        for warning in problem['presolve_warnings']:
+            print(f"  - {format_presolve_warning(warning)}")
+        print()
+
+    result, total_planned_lessons, total_time_between_lessons = solve_week_by_days(problem)
+
+    report_sink = open_report_sink(report_filename)
+    try:
+        write_report(report_sink, result['lessons'], problem['week_dates'], report_format)
+    finally:
+        if report_sink is not sys.stdout:
+            report_sink.close()
+
+    print(result['summary'])
+    print(f"Totale tijd tussen lessen: {total_time_between_lessons} minuten")
+    for warning in result['warnings']:
+        print(f"  - {warning}")
+
+    # Create JSON output file
+    print("\n=== JSON BESTAND AANMAKEN ===")
+    create_output_json(result, None, None, input_filename=input_filename, existing_lessons=existing_lessons)
+
+def run_what_if(input_filename, variants_filename, output_filename):
+    """Compare settings variants from a JSON file and write the comparison table"""
+    with open(variants_filename, 'r', encoding='utf-8') as f:
+        variants = json.load(f)
+
+    comparison = evaluate_settings_variants(load_input(input_filename), variants)
+
+    print("=== VERGELIJKING VAN INSTELLINGEN ===")
+    print()
+    for i, variant_result in enumerate(comparison):
+        settings = variant_result['instellingen']
+        print(f"Variant {i+1} (pauze {settings['pauzeTussenLessen']}, lange pauze {settings['langePauzeDuur']}, "
+              f"blokuren {settings['blokuren']}, locaties koppelen {settings['locatiesKoppelen']}): "
+              f"{variant_result['lessen']} lessen, {variant_result['totale_minuten_tussen_lessen']} minuten rust, "
+              f"{sum(variant_result['leerlingen_zonder_les'].values())} les(sen) tekort")
+
+    with open(output_filename, 'w', encoding='utf-8') as f:
+        json.dump({"varianten": comparison}, f, indent=2, ensure_ascii=False)
+
+    print()
+    print(f"JSON bestand '{output_filename}' succesvol aangemaakt!")
+
+def run_horizon_planning(input_filename, weeks, rollover, output_filename, seed=None):
+    """Plan several consecutive weeks for the input file and write the horizon planning"""
+    if seed is None:
+        seed = new_seed()
+    data = load_input(input_filename)
+    active_days = [day for day, hours in data['instructeur']['beschikbareUren'].items() if hours]
+    variations, start_options = seeded_day_variations(seed, min(100, factorial(len(active_days))))
+    print(f"Seed: {seed}")
+
+    week_results, students_without_lessons = plan_horizon(data, weeks, variations, start_options, rollover=rollover)
+
+    print(f"=== PLANNING VOOR {weeks} WEKEN ===")
+    print()
+    for week_result in week_results:
+        print(f"Week {week_result['week']} ({week_result['datums'][0]} t/m {week_result['datums'][-1]}): "
+              f"{week_result['lessen']} lessen, {week_result['totale_minuten_tussen_lessen']} minuten rust")
+
+    if students_without_lessons:
+        print(f"\nLeerlingen die na {weeks} weken nog lessen tekort komen:")
+        for student_name, missing_count in students_without_lessons.items():
+            print(f"  - {student_name}: {missing_count} les(sen) tekort")
+    else:
+        print(f"\nAlle leerlingen hebben het gewenste aantal lessen gekregen!")
+
+    output_data = {
+        "weken": week_results,
+        "leerlingen_zonder_les": students_without_lessons,
+        "schedule_details": {
+            "lessen": sum(week_result['lessen'] for week_result in week_results),
+            "totale_minuten_tussen_lessen": sum(week_result['totale_minuten_tussen_lessen'] for week_result in week_results)
+        }
+    }
+    with open(output_filename, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+
+    print()
+    print(f"JSON bestand '{output_filename}' succesvol aangemaakt!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genereer een weekplanning voor een rijinstructeur")
+    parser.add_argument('--input', default='scripts/sample_input.json', help="Invoerbestand met instructeur en leerlingen")
+    parser.add_argument('--modus', choices=['volgordes', 'dagen'], default='volgordes', help="Zoek over dag volgordes, of verbeter de beste volgorde door dagen parallel opnieuw in te plannen")
+    parser.add_argument('--what-if', dest='what_if', help="JSON bestand met een lijst instellingen-varianten om te vergelijken")
+    parser.add_argument('--weken', type=int, default=1, help="Aantal opeenvolgende weken om in te plannen")
+    parser.add_argument('--geen-doorschuiven', dest='doorschuiven', action='store_false', help="Tekorten niet doorschuiven naar de volgende week")
+    parser.add_argument('--bestaande-lessen', dest='bestaande_lessen', help="JSON bestand met de opgeslagen lessen; schrijft alleen de wijzigingen (insert/update/delete)")
+    parser.add_argument('--rapport', help="Schrijf het lesoverzicht naar dit bestand in plaats van naar de console")
+    parser.add_argument('--rapport-formaat', dest='rapport_formaat', choices=['text', 'json'], default='text', help="Formaat van het lesoverzicht (json: één regel per dag)")
+    parser.add_argument('--seed', type=int, help="Seed voor de willekeurige dag volgordes (zelfde seed geeft dezelfde planning)")
+    parser.add_argument('--checkpoint', help="Bewaar de voortgang van de zoektocht in dit bestand en hervat daaruit")
+    parser.add_argument('--output', help="Uitvoerbestand voor --what-if of --weken")
+    args = parser.parse_args()
+
+    if args.what_if:
+        run_what_if(args.input, args.what_if, args.output or 'src/app/dashboard/ai-schedule/what_if_planning.json')
+    elif args.weken > 1:
+        run_horizon_planning(args.input, args.weken, args.doorschuiven, args.output or 'src/app/dashboard/ai-schedule/horizon_planning.json', args.seed)
+    elif args.modus == 'dagen':
+        run_day_planning(args.input, args.bestaande_lessen, args.rapport, args.rapport_formaat)
+    else:
+        run_week_planning(args.input, args.bestaande_lessen, args.rapport, args.rapport_formaat, args.seed, args.checkpoint)
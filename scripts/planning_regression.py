@@ -0,0 +1,274 @@
+"""
+Regression harness for the week planner: plans a fixed corpus of inputs with every
+solver mode, checks the plans with a validator of its own and compares lessons,
+time between lessons, shortfalls, rule violations and runtime with the scoreboard.
+
+The corpus in scripts/regression_inputs holds no real planning data:
+
+- scripts_sample.json: the repo's own scripts/sample_input.json;
+- locations.json and blocked_car_time.json: edited copies of that sample, with
+  student locations and with car time taken by another instructor ("bezet");
+- long_break.json and no_block_hours.json: synthetic inputs with 40 students, for the
+  long break after 3 hours of lessons and for instructors without block hours.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import generate_week_planning as planner
+
+# Lessons of different students need a pause between them, and the instructor needs a
+# longer break after at most 3 hours of lessons
+MAX_RUN_MINUTES = 180
+
+# Solver modes that are compared; every mode is deterministic so runs are comparable
+SOLVER_MODES = ['volgordes', 'dagen']
+
+DEFAULT_INPUT_DIR = 'scripts/regression_inputs'
+DEFAULT_SCOREBOARD_FILE = 'scripts/regression_inputs/scoreboard.json'
+
+
+def to_minutes(time_str):
+    """Parse HH:MM (or HH:MM:SS) to minutes since midnight"""
+    hours, minutes = time_str.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+def get_blocked_time(data):
+    """
+    The time a corpus input marks as taken elsewhere (e.g. the shared car in use by
+    another instructor), {day: [[start, end]]} under "bezet", in minutes per day
+    """
+    return {
+        day: [(to_minutes(start), to_minutes(end)) for start, end in intervals]
+        for day, intervals in data.get('bezet', {}).items()
+    }
+
+def get_input_settings(data):
+    """The AI settings stored in the input itself, so the environment can't change a run"""
+    instructor = data['instructeur']
+    return {
+        'pauzeTussenLessen': instructor.get('pauzeTussenLessen', 5),
+        'langePauzeDuur': instructor.get('langePauzeDuur', 0),
+        'locatiesKoppelen': instructor.get('locatiesKoppelen', True),
+        'blokuren': instructor.get('blokuren', True)
+    }
+
+def validate_schedule(data, lessons, settings):
+    """
+    Check a planning against the scheduling rules, independently of the planner.
+
+    Args:
+        data: The planner input (instructeur + leerlingen, optionally bezet)
+        lessons: The planned lessons (pause lessons are ignored)
+        settings: The AI settings the planning was made with
+
+    Returns:
+        A list of violations, each {'type': ..., 'date': ..., 'details': ...}
+    """
+    week_order = ['maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag']
+    date_to_day = {date: week_order[i] for i, date in enumerate(data['instructeur'].get('datums', [])[:7])}
+    students = {student['id']: student for student in data['leerlingen']}
+    blocked = get_blocked_time(data)
+    violations = []
+
+    lessons_by_date = defaultdict(list)
+    lessons_per_student = defaultdict(int)
+    for lesson in lessons:
+        if lesson['studentId'] == "PAUSE":
+            continue
+        start, end = to_minutes(lesson['startTime']), to_minutes(lesson['endTime'])
+        lessons_by_date[lesson['date']].append((start, end, lesson['studentId']))
+        lessons_per_student[lesson['studentId']] += 1
+
+        student = students.get(lesson['studentId'])
+        day = date_to_day.get(lesson['date'])
+        if student is None or day is None:
+            violations.append({'type': 'onbekende_les', 'date': lesson['date'], 'details': lesson})
+            continue
+        if end - start != student['lesDuur']:
+            violations.append({'type': 'verkeerde_lesduur', 'date': lesson['date'], 'details': lesson})
+
+        instructor_hours = data['instructeur']['beschikbareUren'].get(day) or []
+        if len(instructor_hours) < 2 or start < to_minutes(instructor_hours[0]) or end > to_minutes(instructor_hours[1]):
+            violations.append({'type': 'buiten_uren_instructeur', 'date': lesson['date'], 'details': lesson})
+
+        student_window = student['beschikbaarheid'].get(day) or []
+        if len(student_window) < 2 or start < to_minutes(student_window[0]) or end > to_minutes(student_window[1]):
+            violations.append({'type': 'buiten_beschikbaarheid', 'date': lesson['date'], 'details': lesson})
+
+        if any(start < blocked_end and blocked_start < end for blocked_start, blocked_end in blocked.get(day, [])):
+            violations.append({'type': 'overlap_bezet', 'date': lesson['date'], 'details': lesson})
+
+    for student_id, count in lessons_per_student.items():
+        if student_id in students and count > students[student_id]['lessenPerWeek']:
+            violations.append({'type': 'te_veel_lessen', 'date': None, 'details': {'studentId': student_id, 'lessen': count}})
+
+    for date, day_lessons in lessons_by_date.items():
+        day_lessons.sort()
+
+        # A student gets one lesson per day, or one block hour of two consecutive lessons
+        per_student = defaultdict(list)
+        for start, end, student_id in day_lessons:
+            per_student[student_id].append((start, end))
+        for student_id, student_lessons in per_student.items():
+            is_block_hour = len(student_lessons) == 2 and student_lessons[0][1] == student_lessons[1][0]
+            if len(student_lessons) > 1 and not (settings['blokuren'] and is_block_hour):
+                violations.append({'type': 'meerdere_lessen_per_dag', 'date': date, 'details': {'studentId': student_id}})
+
+        # Compare every lesson with the lesson before it that ends last
+        previous = None
+        for start, end, student_id in day_lessons:
+            if previous is not None:
+                previous_end, previous_student_id = previous
+                if start < previous_end:
+                    violations.append({'type': 'overlap', 'date': date, 'details': {'studentIds': [previous_student_id, student_id]}})
+                elif student_id != previous_student_id and start - previous_end < settings['pauzeTussenLessen']:
+                    violations.append({'type': 'pauze_ontbreekt', 'date': date, 'details': {'studentIds': [previous_student_id, student_id]}})
+            if previous is None or end > previous[0]:
+                previous = (end, student_id)
+
+        # A run continues as long as the gaps are no longer than the normal pause
+        run_start, run_end = None, None
+        for start, end, student_id in day_lessons:
+            if run_start is None or start - run_end > settings['pauzeTussenLessen']:
+                run_start = start
+            run_end = max(end, run_end or end)
+            if run_end - run_start > MAX_RUN_MINUTES:
+                violations.append({'type': 'te_lang_achter_elkaar', 'date': date, 'details': {'minuten': run_end - run_start}})
+                run_start = None
+
+    return violations
+
+def run_solver_mode(data, mode):
+    """Plan the input with one solver mode and return the result dictionary from the planner"""
+    problem = planner.prepare_problem(data, get_input_settings(data))
+    problem['blocked'] = get_blocked_time(data)
+    if mode == 'dagen':
+        result, score, total_time_between_lessons = planner.solve_week_by_days(problem)
+        return result
+    variations = planner.day_variations[:7] * 2
+    start_options = [True] * 7 + [False] * 7
+    best_week_index, highest_score, best_rest_time, best_start_vanaf_begin, results = planner.search_best_week_planning(problem, variations, start_options)
+    return results[best_week_index][3]
+
+def measure(data, mode, repeats):
+    """Run one solver mode on one input and record quality, rule violations and runtime"""
+    runtimes = []
+    for repeat in range(repeats):
+        started = time.perf_counter()
+        result = run_solver_mode(data, mode)
+        runtimes.append(time.perf_counter() - started)
+
+    lessons = [lesson for lesson in result['lessons'] if lesson['studentId'] != "PAUSE"]
+    lessons_by_date = defaultdict(list)
+    for lesson in lessons:
+        lessons_by_date[lesson['date']].append((to_minutes(lesson['startTime']), to_minutes(lesson['endTime'])))
+    total_time_between_lessons = 0
+    for day_lessons in lessons_by_date.values():
+        day_lessons.sort()
+        total_time_between_lessons += sum(next_start - end for (start, end), (next_start, next_end) in zip(day_lessons, day_lessons[1:]))
+
+    planned = defaultdict(int)
+    for lesson in lessons:
+        planned[lesson['studentId']] += 1
+    shortfall = {
+        student['id']: student['lessenPerWeek'] - planned[student['id']]
+        for student in data['leerlingen']
+        if student['lessenPerWeek'] > planned[student['id']]
+    }
+
+    violations = defaultdict(int)
+    for violation in validate_schedule(data, lessons, get_input_settings(data)):
+        violations[violation['type']] += 1
+
+    return {
+        "lessen": len(lessons),
+        "totale_minuten_tussen_lessen": total_time_between_lessons,
+        "tekort": shortfall,
+        "schendingen": dict(violations),
+        # The fastest repeat is the least noisy estimate
+        "looptijd_seconden": round(min(runtimes), 4)
+    }
+
+def compare(name, mode, score, baseline, runtime_factor, runtime_slack):
+    """Return the reasons why a score is a regression compared to its baseline"""
+    failures = []
+    if score['lessen'] < baseline['lessen']:
+        failures.append(f"minder lessen ({score['lessen']} < {baseline['lessen']})")
+    elif score['lessen'] == baseline['lessen'] and score['totale_minuten_tussen_lessen'] > baseline['totale_minuten_tussen_lessen']:
+        failures.append(f"meer tijd tussen lessen ({score['totale_minuten_tussen_lessen']} > {baseline['totale_minuten_tussen_lessen']})")
+    if sum(score['tekort'].values()) > sum(baseline['tekort'].values()):
+        failures.append(f"meer tekort ({sum(score['tekort'].values())} > {sum(baseline['tekort'].values())})")
+    for violation_type, count in score['schendingen'].items():
+        if count > baseline['schendingen'].get(violation_type, 0):
+            failures.append(f"meer schendingen {violation_type} ({count} > {baseline['schendingen'].get(violation_type, 0)})")
+    if score['looptijd_seconden'] > baseline['looptijd_seconden'] * runtime_factor + runtime_slack:
+        failures.append(f"trager ({score['looptijd_seconden']}s > {baseline['looptijd_seconden']}s x {runtime_factor} + {runtime_slack}s)")
+    return [f"{name} [{mode}]: {failure}" for failure in failures]
+
+def run_regression(input_dir, scoreboard_file, modes, update, repeats, runtime_factor, runtime_slack):
+    """Score every corpus input with every solver mode and compare against the scoreboard"""
+    input_files = sorted(
+        filename for filename in os.listdir(input_dir)
+        if filename.endswith('.json') and os.path.join(input_dir, filename) != scoreboard_file
+    )
+    baseline_scoreboard = {}
+    if os.path.exists(scoreboard_file):
+        with open(scoreboard_file, 'r', encoding='utf-8') as f:
+            baseline_scoreboard = json.load(f)
+
+    scoreboard = {}
+    failures = []
+    print(f"{'invoer':<30} {'modus':<10} {'lessen':>6} {'rust':>6} {'tekort':>6} {'schendingen':>11} {'looptijd':>9}")
+    for filename in input_files:
+        name = os.path.splitext(filename)[0]
+        data = planner.load_input(os.path.join(input_dir, filename))
+        scoreboard[name] = {}
+        for mode in modes:
+            score = measure(data, mode, repeats)
+            scoreboard[name][mode] = score
+            print(f"{name:<30} {mode:<10} {score['lessen']:>6} {score['totale_minuten_tussen_lessen']:>6} "
+                  f"{sum(score['tekort'].values()):>6} {sum(score['schendingen'].values()):>11} {score['looptijd_seconden']:>8}s")
+
+            baseline = baseline_scoreboard.get(name, {}).get(mode)
+            if baseline is not None:
+                failures.extend(compare(name, mode, score, baseline, runtime_factor, runtime_slack))
+
+    if update:
+        with open(scoreboard_file, 'w', encoding='utf-8') as f:
+            json.dump(scoreboard, f, indent=2, ensure_ascii=False)
+        print(f"\nScorebord '{scoreboard_file}' bijgewerkt")
+        return 0
+
+    if failures:
+        print("\nREGRESSIES:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\nGeen regressies gevonden")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vergelijk de planner op een vaste set invoer met het scorebord")
+    parser.add_argument('--inputs', default=DEFAULT_INPUT_DIR, help="Map met de invoerbestanden")
+    parser.add_argument('--scoreboard', default=DEFAULT_SCOREBOARD_FILE, help="Scorebord met de referentiewaarden")
+    parser.add_argument('--modus', action='append', choices=SOLVER_MODES, help="Alleen deze solver modus (meerdere keren mogelijk)")
+    parser.add_argument('--update', action='store_true', help="Schrijf de huidige resultaten als nieuw scorebord")
+    parser.add_argument('--herhalingen', type=int, default=3, help="Aantal runs per invoer en modus voor de looptijd")
+    parser.add_argument('--looptijd-factor', dest='looptijd_factor', type=float, default=1.5, help="Maximale toegestane groei van de looptijd")
+    parser.add_argument('--looptijd-marge', dest='looptijd_marge', type=float, default=0.02, help="Extra toegestane looptijd in seconden bovenop de factor (tegen meetruis bij korte runs)")
+    args = parser.parse_args()
+
+    sys.exit(run_regression(
+        args.inputs,
+        args.scoreboard,
+        args.modus or SOLVER_MODES,
+        args.update,
+        args.herhalingen,
+        args.looptijd_factor,
+        args.looptijd_marge
+    ))